@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Affiliate', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='affiliateapplication',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending Review'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('spam', 'Spam')], default='pending', max_length=10),
+        ),
+    ]
@@ -6,6 +6,7 @@ class AffiliateApplication(models.Model):
         ("pending", "Pending Review"),
         ("approved", "Approved"),
         ("rejected", "Rejected"),
+        ("spam", "Spam"),
     ]
 
     AUDIENCE_CHOICES = [
@@ -30,6 +31,10 @@ class AffiliateApplication(models.Model):
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Spam scoring (utils.spam). website_or_social is a URL by design, so it
+    # is left out of the link count.
+    spam_fields = ("promotion_channels", "strategy")
+
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Affiliate Application"
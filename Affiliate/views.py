@@ -6,6 +6,9 @@ from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
 from django.views.generic import TemplateView
 
+from utils import spam
+from utils.ratelimit import client_ip, ratelimit
+
 from .models import AffiliateApplication
 
 logger = logging.getLogger(__name__)
@@ -15,13 +18,9 @@ class AffiliateView(TemplateView):
     template_name = "Affiliates/affiliate.html"
 
 
-def _client_ip(request):
-    xff = request.META.get('HTTP_X_FORWARDED_FOR')
-    return xff.split(',')[0].strip() if xff else request.META.get('REMOTE_ADDR')
-
-
 @csrf_protect
 @require_POST
+@ratelimit("affiliate")
 def affiliate_apply(request):
     """Handles the affiliate signup form via fetch(). Returns JSON so the page
     can show a success/error state without a full reload."""
@@ -39,7 +38,7 @@ def affiliate_apply(request):
                 {'success': False, 'error': 'Name and email are required.'}, status=400
             )
 
-        AffiliateApplication.objects.create(
+        application = AffiliateApplication(
             full_name=full_name,
             email=email,
             phone=(payload.get('phone') or '').strip(),
@@ -47,8 +46,11 @@ def affiliate_apply(request):
             audience_size=(payload.get('audience_size') or '').strip(),
             promotion_channels=(payload.get('promotion_channels') or '').strip(),
             strategy=(payload.get('strategy') or '').strip(),
-            ip_address=_client_ip(request),
+            ip_address=client_ip(request, default=None),
         )
+        # Spam is saved for review with status "spam"; the response is the same.
+        spam.screen(application, application.ip_address)
+        application.save()
         return JsonResponse({'success': True})
 
     except json.JSONDecodeError:
@@ -1,12 +1,13 @@
 from django.contrib import admin
 from .models import ContactMessage, ContactSettings, AboutSection, Merch
+from utils.moderation import screen_selected
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'subject_display', 'status_badge', 'created_at']
-    list_filter = ['status', 'subject', 'created_at']
+    list_display = ['name', 'email', 'subject_display', 'status_badge', 'flagged', 'created_at']
+    list_filter = ['status', 'subject', 'flagged', 'created_at']
     search_fields = ['name', 'email', 'message']
-    readonly_fields = ['created_at', 'updated_at', 'ip_address', 'user_agent', 'responded_at']
+    readonly_fields = ['created_at', 'updated_at', 'ip_address', 'user_agent', 'responded_at', 'flagged_words', 'screened_at']
 
     fieldsets = (
         ('Contact Information', {
@@ -18,6 +19,9 @@ class ContactMessageAdmin(admin.ModelAdmin):
         ('Status & Response', {
             'fields': ('status', 'responded_at')
         }),
+        ('Moderation', {
+            'fields': ('flagged', 'flagged_words', 'screened_at')
+        }),
         ('Metadata', {
             'fields': ('ip_address', 'user_agent', 'created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -43,7 +47,7 @@ class ContactMessageAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = 'Status'
 
-    actions = ['mark_as_read', 'mark_as_replied', 'archive_messages']
+    actions = ['mark_as_read', 'mark_as_replied', 'archive_messages', screen_selected]
 
     def mark_as_read(self, request, queryset):
         updated = queryset.exclude(status='read').update(status='read')
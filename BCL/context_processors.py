@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import AboutSection, ContactSettings
+
+
+def site_settings(request):
+    """Contact details, social links and the about section for any template.
+    Lazy, and served from the singleton cache when used - no queries either way."""
+    return {
+        "contact_settings": SimpleLazyObject(ContactSettings.get_settings),
+        "about_section": SimpleLazyObject(AboutSection.current),
+    }
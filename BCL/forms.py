@@ -1,5 +1,6 @@
 from django import forms
 from django.core.validators import RegexValidator
+from utils.ratelimit import client_ip
 from .models import ContactMessage
 
 class ContactForm(forms.ModelForm):
@@ -79,10 +80,5 @@ class ContactForm(forms.ModelForm):
         return instance
 
     def _get_client_ip(self, request):
-        """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        """Get client IP address (see utils.ratelimit.client_ip)"""
+        return client_ip(request, default=None)
\ No newline at end of file
@@ -2,6 +2,8 @@ from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from utils.singleton import CachedSingleton
+
 class ContactMessage(models.Model):
     """Model for storing contact form submissions"""
 
@@ -18,6 +20,7 @@ class ContactMessage(models.Model):
         ('read', 'Read'),
         ('replied', 'Replied'),
         ('archived', 'Archived'),
+        ('spam', 'Spam'),
     ]
 
     # Personal Information
@@ -42,6 +45,15 @@ class ContactMessage(models.Model):
     # Response tracking
     responded_at = models.DateTimeField(blank=True, null=True)
 
+    # Moderation (utils.moderation)
+    flagged = models.BooleanField(default=False)
+    flagged_words = models.CharField(max_length=255, blank=True, editable=False)
+    screened_at = models.DateTimeField(blank=True, null=True, editable=False)
+    moderated_fields = ('subject_other', 'message')
+
+    # Spam scoring (utils.spam)
+    spam_fields = ('subject_other', 'message')
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Contact Message"
@@ -121,9 +133,9 @@ class ContactSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        """Get or create singleton settings"""
-        settings, created = cls.objects.get_or_create(pk=1)
-        return settings
+        """The singleton settings, cached (see BCL.signals). Until staff save
+        the row this is an unsaved instance with the defaults - a read never writes."""
+        return contact_settings.get()
 
     def __str__(self):
         return "Contact Page Settings"
@@ -134,6 +146,7 @@ class AboutSection(models.Model):
     title = models.CharField(max_length=200, default="About BCL PRODUCTION")
     content = models.TextField(default="BCL PRODUCTION is a leading media production company based in Nairobi, Kenya...")
     image = models.ImageField(upload_to='about_images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     video = models.FileField(
         upload_to='about_videos/',
         blank=True,
@@ -144,6 +157,9 @@ class AboutSection(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Resized/re-encoded off the request path, see utils/images.py
+    responsive_image_field = 'image'
+
     class Meta:
         verbose_name = "About Section"
         verbose_name_plural = "About Sections"
@@ -151,6 +167,11 @@ class AboutSection(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def current(cls):
+        """The section shown on the landing page (the first one), cached; None if there is none."""
+        return about_section.get()
+
 class Merch(models.Model):
     """Model for merchandise items"""
 
@@ -158,12 +179,22 @@ class Merch(models.Model):
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='merch_images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    responsive_image_field = 'image'
+    responsive_image_widths = (320, 640, 960)
+
     class Meta:
         verbose_name = "Merchandise Item"
         verbose_name_plural = "Merchandise Items"
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+contact_settings = CachedSingleton(
+    "bcl:contact_settings", lambda: ContactSettings.objects.order_by("pk").first() or ContactSettings()
+)
+about_section = CachedSingleton("bcl:about_section", lambda: AboutSection.objects.order_by("pk").first())
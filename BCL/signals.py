@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AboutSection, ContactSettings, about_section, contact_settings
+
+
+@receiver([post_save, post_delete], sender=ContactSettings)
+def invalidate_contact_settings(sender, **kwargs):
+    contact_settings.invalidate()
+
+
+@receiver([post_save, post_delete], sender=AboutSection)
+def invalidate_about_section(sender, **kwargs):
+    about_section.invalidate()
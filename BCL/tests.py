@@ -1,3 +1,25 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from utils import singleton
+
+from .models import ContactSettings
+
+
+class ContactSettingsCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        singleton.clear_local()
+
+    def test_edit_is_picked_up_after_commit(self):
+        settings = ContactSettings.objects.create(phone="+254 700 000 001")
+        self.assertEqual(ContactSettings.get_settings().phone, "+254 700 000 001")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.phone = "+254 700 000 002"
+            settings.save()
+            # Not committed yet: nothing is invalidated, so nothing can be
+            # rebuilt from the old row and cached.
+            self.assertEqual(ContactSettings.get_settings().phone, "+254 700 000 001")
+        self.assertEqual(ContactSettings.get_settings().phone, "+254 700 000 002")
@@ -5,8 +5,11 @@ from django.core.mail import send_mail
 from django.conf import settings
 from .forms import ContactForm
 from django.shortcuts import redirect
-from .models import ContactSettings, ContactMessage, AboutSection, Merch
-from colorama import Fore, Style
+from django.utils.decorators import method_decorator
+from utils import spam
+from utils.ratelimit import ratelimit
+from .models import ContactSettings, ContactMessage, Merch
+from Home.models import OutboundEmail
 
 class landing(ListView):
     template_name = 'BCL/index.html'
@@ -15,18 +18,8 @@ class landing(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add contact settings to template
-        context['settings'] = ContactSettings.get_settings()
-        about_section = AboutSection.objects.first()
-        context['about_section_img'] = about_section.image if about_section else None
-        context['about_section_video'] = about_section.video if about_section else None
-        socials = ContactSettings.get_settings()
-        print(f"{Fore.GREEN}ContactSettings socials: {socials.instagram}, {socials.tiktok}, {socials.youtube}, {socials.facebook}, {socials.twitter}{Style.RESET_ALL}")
-        context['instagram'] = socials.instagram
-        context['tiktok'] = socials.tiktok
-        context['youtube'] = socials.youtube
-        context['facebook'] = socials.facebook
-        context['twitter'] = socials.twitter
+        # Contact/social settings and the about section come from
+        # BCL.context_processors.site_settings (cached singletons).
         context['form'] = ContactForm()
 
         # merch
@@ -34,21 +27,22 @@ class landing(ListView):
         return context
 
 
+    @method_decorator(ratelimit("bcl_contact"))
     def post(self, request, *args, **kwargs):
         form = ContactForm(request.POST)
         if form.is_valid():
-            contact_message = form.save()
-            # Send auto-reply email if enabled
-            # settings = ContactSettings.get_settings()
-            # if settings.auto_reply_enabled:
-            #     send_mail(
-            #         subject=settings.auto_reply_subject,
-            #         message=settings.auto_reply_message,
-            #         from_email=settings.email_general,
-            #         recipient_list=[contact_message.email],
-            #         fail_silently=True,
-            #     )
-            form.save()
+            contact_message = form.save(commit=False, request=request)
+            is_spam = spam.screen(contact_message, contact_message.ip_address)
+            contact_message.save()
+            # Queue auto-reply email if enabled (delivered by the sendQueuedEmail command)
+            settings = ContactSettings.get_settings()
+            if settings.auto_reply_enabled and not is_spam:
+                OutboundEmail.queue(
+                    subject=settings.auto_reply_subject,
+                    message=settings.auto_reply_message,
+                    from_email=settings.email_general,
+                    recipient_list=[contact_message.email],
+                )
             messages.success(request, "Your message has been sent successfully!")
             return redirect(reverse_lazy('bcl_home'))
         else:
@@ -73,16 +73,17 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 
 MIDDLEWARE = [
+    'utils.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'utils.pagecache.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'BlackCodeLabs.urls'
@@ -98,6 +99,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'Home.context_processors.site_meta',
+                'BCL.context_processors.site_settings',
             ],
         },
     },
@@ -136,6 +138,19 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# The local-memory cache is per process. Point this at Redis/Memcached in
+# production so rate limits and cached pages are shared between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blackcodelabs',
+    }
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -160,19 +175,51 @@ STATICFILES_DIRS = [
     BASE_DIR / 'BCL' / 'static',
 ]
 
+# collectstatic writes content-hashed copies (style.3f2a9c.css) plus .gz and
+# .br siblings; WhiteNoise serves the smallest one the browser accepts and
+# marks hashed names `immutable` with a ten-year max-age (see
+# utils/staticfiles.py). Brotli output needs the Brotli package. Report what
+# compression saved with `python manage.py staticReport`.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'utils.staticfiles.ManifestStaticFilesStorage',
+    },
+}
+# Unhashed URLs (files referenced by name outside templates) get a day.
+WHITENOISE_MAX_AGE = 60 * 60 * 24
+
 MEDIA_URL = '/media/'
 
 import os
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # LOGGING CONFIGURATION
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+os.makedirs(LOG_DIR, exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json_lines': {
+            'format': '%(message)s',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'slow_requests': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(LOG_DIR, 'slow_requests.log'),
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'json_lines',
+            'delay': True,
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -184,6 +231,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'timing.slow': {  # utils/timing.py, one JSON object per line
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
         'Home': {  # Your app name
             'handlers': ['console'],
             'level': 'DEBUG',  # Set to DEBUG for more details
@@ -234,4 +286,119 @@ WHATSAPP_NUMBER = config('WHATSAPP_NUMBER', default='254731209601')
 # EMAIL_USE_TLS = True
 # EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 # EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
-# DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER')
\ No newline at end of file
+# DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER')
+
+# ---------------------------------------------------------------------------
+# QR CODE GENERATOR
+# Rendered codes are cached by a hash of (data, size, style): a per-process
+# LRU of QR_CACHE_MAX_ENTRIES items in front of PNG files in QR_CACHE_DIR,
+# which is shared by every worker. Delete the directory to reset it.
+# Files unread for QR_CACHE_MAX_FILE_AGE seconds are pruned, then the least
+# recently read until the directory fits in QR_CACHE_MAX_BYTES.
+QR_CACHE_DIR = config('QR_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'qr'))
+QR_CACHE_MAX_ENTRIES = config('QR_CACHE_MAX_ENTRIES', default=256, cast=int)
+QR_CACHE_MAX_BYTES = config('QR_CACHE_MAX_BYTES', default=256 * 1024 * 1024, cast=int)
+QR_CACHE_MAX_FILE_AGE = 60 * 60 * 24 * 30
+QR_CACHE_MAX_AGE = 60 * 60 * 24  # seconds browsers/CDNs may reuse a code
+
+# Batch endpoint (/qr-code/batch/): renders are spread over a process pool of
+# QR_BATCH_WORKERS processes (default: CPU count - 1, 0 renders inline).
+QR_BATCH_WORKERS = config('QR_BATCH_WORKERS', default=None, cast=lambda v: None if v in (None, '') else int(v))
+QR_BATCH_MAX_ITEMS = config('QR_BATCH_MAX_ITEMS', default=5000, cast=int)
+
+
+# ---------------------------------------------------------------------------
+# RATE LIMITING (utils/ratelimit.py)
+# Per-IP token buckets for the anonymous write/compute endpoints. Budgets are
+# "<requests>/<s|m|h|d>". The budgets are utils.ratelimit.DEFAULT_RATES; list
+# a scope here only to override it, e.g. {'contact': '20/h'}.
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+RATELIMIT_CACHE = 'default'
+RATELIMITS = {}
+# Reverse proxies (IPs or CIDRs, comma separated) whose X-Forwarded-For is
+# believed. Empty: the client is always REMOTE_ADDR.
+TRUSTED_PROXIES = config('TRUSTED_PROXIES', default='', cast=lambda v: [p.strip() for p in v.split(',') if p.strip()])
+
+# ---------------------------------------------------------------------------
+# HOMEPAGE
+# The homepage's services/counters/reviews are cached and invalidated by
+# Home.signals whenever staff edit them; this is only a safety-net expiry.
+HOMEPAGE_CACHE_TIMEOUT = 60 * 60
+
+# ---------------------------------------------------------------------------
+# BLOG
+# Sidebar counts/popular posts/categories are cached and kept current by
+# Blogs.signals; this is only a safety-net expiry.
+BLOG_SIDEBAR_CACHE_TIMEOUT = 60 * 60
+# Post views: repeat views by the same session/IP within the window are not
+# counted; counts are buffered in memory and written every flush interval.
+BLOG_VIEW_DEDUPE_WINDOW = 30 * 60
+BLOG_VIEW_FLUSH_INTERVAL = 10
+
+# ---------------------------------------------------------------------------
+# REQUEST TIMING (utils/timing.py)
+# Requests slower than this are logged to logs/slow_requests.log; the last
+# TIMING_WINDOW requests per view feed the p50/p95/p99 at /staff/timing/.
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+TIMING_WINDOW = 1000
+
+# ---------------------------------------------------------------------------
+# RESPONSIVE IMAGES (utils/images.py)
+# Uploaded images get AVIF/WebP/JPEG derivatives built by a background thread
+# in the web process. Set to False to leave it all to a scheduled
+# `python manage.py buildImageVariants`.
+IMAGE_VARIANTS_IN_PROCESS = config('IMAGE_VARIANTS_IN_PROCESS', default=True, cast=bool)
+
+# ---------------------------------------------------------------------------
+# MEDIA SERVING (utils/media.py)
+# MEDIA_URL is served by utils.media.serve_media (Range, ETag, 304s). Behind
+# a proxy, let it send the bytes instead: MEDIA_ACCEL = "x-accel" for nginx,
+# with an internal location mapping MEDIA_ACCEL_PREFIX onto MEDIA_ROOT:
+#
+#     location /protected-media/ { internal; alias /path/to/media/; }
+#
+# or "x-sendfile" for Apache mod_xsendfile / lighttpd.
+MEDIA_ACCEL = config('MEDIA_ACCEL', default='')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# ---------------------------------------------------------------------------
+# SITE SETTINGS (utils/singleton.py)
+# ContactSettings/AboutSection are cached in the shared cache until edited;
+# each process also keeps its own copy for this many seconds, so an edit
+# reaches every worker within it.
+SINGLETON_LOCAL_TTL = 5
+# Safety-net expiry of the shared copy, should an invalidation ever be lost.
+SINGLETON_CACHE_TIMEOUT = 60 * 60
+
+# ---------------------------------------------------------------------------
+# SPAM SCORING (utils/spam.py)
+# Contact, affiliate and project-request submissions scoring SPAM_THRESHOLD or
+# more are saved with status "spam" and trigger no email. Links, disposable
+# email domains, repeated bodies and bursts from one IP each add to the score.
+SPAM_THRESHOLD = 1
+SPAM_MAX_LINKS = 3
+SPAM_MIN_WORDS = 20
+SPAM_DUPLICATE_WINDOW = 60 * 60
+SPAM_RATE_LIMIT = 3
+SPAM_RATE_WINDOW = 10 * 60
+
+# ---------------------------------------------------------------------------
+# SITEMAPS (utils/sitemaps.py)
+# Each section is re-rendered when its newest lastmod or row count changes;
+# this timeout only catches edits that move neither (e.g. a changed slug).
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+SITEMAP_MAX_AGE = 60 * 60
+
+# ---------------------------------------------------------------------------
+# PAGE CACHE (utils/pagecache.py)
+# Rendered pages of these views are cached for anonymous visitors and purged
+# when a model they read is saved. Stale pages are served for up to
+# PAGE_CACHE_STALE_TTL while one request renders the replacement.
+PAGE_CACHE_VIEWS = [
+    'home', 'solutions', 'solution_detail', 'pricing', 'portfolio', 'portfolio_detail',
+    'games', 'affiliate', 'blog:list', 'blog:detail',
+]
+PAGE_CACHE_QUERY_PARAMS = ('category', 'cursor', 'page')
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=60 * 10, cast=int)
+PAGE_CACHE_STALE_TTL = 60 * 60 * 24
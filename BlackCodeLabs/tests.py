@@ -0,0 +1,200 @@
+"""
+Per-view query and wall-time budgets.
+
+The database is seeded through the project's own seed commands, then every
+page in BlackCodeLabs/urls.py is requested with a cold cache and must stay
+within its budget of SQL queries and milliseconds. A view that starts
+issuing a query per row (N+1) fails here long before it is noticed in
+production.
+
+    python manage.py test BlackCodeLabs
+
+Set VIEW_BUDGET_REPORT=1 to also print the measured figures, e.g. when
+adjusting a budget after a deliberate change.
+"""
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Blogs import viewcount
+from Blogs.models import Comment, Post
+from Home.models import PortfolioProject, PricingPlan, Solution
+from utils import singleton
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="bcl-budget-media-")
+
+# The manifest only exists after collectstatic; tests use the plain storage.
+STORAGES = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# (URL name, url or callable(test) -> url, max queries, max milliseconds)
+# Query budgets are the measured count plus one, so a new per-row query fails
+# the test; time budgets are deliberately loose for shared CI machines.
+BUDGETS = [
+    ("home", "/", 4, 500),
+    ("solutions", "/solutions/", 2, 500),
+    ("solution_detail", lambda t: reverse("solution_detail", args=[t.solution.pk]), 2, 500),
+    ("pricing", "/pricing/", 4, 500),
+    ("portfolio", "/portfolio/", 3, 500),
+    ("portfolio", "/portfolio/?cursor=", 2, 500),
+    ("portfolio_detail", lambda t: reverse("portfolio_detail", args=[t.project.slug]), 3, 500),
+    ("games", "/games/", 1, 500),
+    ("contact", "/contact/", 1, 500),
+    ("affiliate", "/affiliates/", 1, 500),
+    ("qr_generator", "/qr-code/", 1, 500),
+    ("qr_code_image", "/qr-code/image/?data=https://blackcodelabs.com", 1, 1500),
+    ("request_timing_stats", "/staff/timing/", 1, 500),
+    ("test_email", "/test-email/", 1, 500),
+    ("robots_txt", "/robots.txt", 1, 500),
+    ("media", "/media/about_videos/clip.mp4", 0, 500),
+    ("sitemap_index", "/sitemap.xml", 10, 1000),
+    ("django.contrib.sitemaps.views.sitemap", "/sitemap-blog.xml", 4, 1000),
+    ("project_list", "/projects/", 3, 500),
+    ("bcl_home", "/BCL/", 4, 500),
+    ("blog:list", "/Blogs/", 6, 500),
+    ("blog:list", "/Blogs/?cursor=", 5, 500),
+    ("blog:list", "/Blogs/?q=campus", 5, 500),
+    ("blog:about", "/Blogs/about/", 1, 500),
+    ("blog:contact", "/Blogs/contact/", 1, 500),
+    ("blog:detail", lambda t: t.busiest_post.get_absolute_url(), 11, 750),
+    ("blog:comment_replies", lambda t: reverse("blog:comment_replies", args=[t.busiest_comment.pk]), 3, 500),
+    ("accounts:login", "/auth/login/", 1, 500),
+    ("accounts:register", "/auth/register/", 1, 500),
+    ("account_login", "/accounts/login/", 4, 500),
+    ("admin:index", "/devAdmin/", 1, 500),
+]
+
+# The same pages for a signed-in reader (like state, reply forms, session).
+AUTHENTICATED_BUDGETS = [
+    ("home", "/", 4, 500),
+    ("blog:list", "/Blogs/", 8, 500),
+    ("blog:detail", lambda t: t.busiest_post.get_absolute_url(), 15, 750),
+]
+
+# Not page views: POST-only endpoints and the logout action.
+UNBUDGETED = {
+    "qr_code_batch", "blog:comment_create", "blog:post_like", "blog:comment_like",
+    "affiliate:apply", "accounts:logout",
+}
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES=STORAGES,
+    RATELIMIT_ENABLED=False,
+    BLOG_VIEW_FLUSH_INTERVAL=3600,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class ViewBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        out = StringIO()
+        cwd = os.getcwd()
+        os.chdir(MEDIA_ROOT)  # Blogs `main` writes generated images under ./media
+        try:
+            call_command("seedStory", count=30, featured=6, stdout=out)
+            call_command("seedServices", stdout=out)
+            call_command("seedSolutions", stdout=out)
+            call_command("main", stdout=out)
+            call_command("merch", stdout=out)
+            call_command("projects", stdout=out)
+        finally:
+            os.chdir(cwd)
+        os.makedirs(os.path.join(MEDIA_ROOT, "about_videos"), exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, "about_videos", "clip.mp4"), "wb") as f:
+            f.write(os.urandom(256 * 1024))
+
+        # No seed command covers these; add enough rows that a per-row query would show.
+        for i in range(12):
+            PortfolioProject.objects.create(
+                title=f"Project {i}", category="web", summary="Summary",
+                completed_year=2020 + i % 5 if i % 4 else None, is_featured=i < 3, display_order=i % 3,
+            )
+        for i in range(3):
+            plan = PricingPlan.objects.create(name=f"Plan {i}", tagline="For teams", monthly_price=10 * (i + 1))
+            for j in range(6):
+                plan.features.create(text=f"Feature {j}")
+
+        cls.solution = Solution.objects.filter(is_active=True).first()
+        cls.project = PortfolioProject.objects.filter(is_active=True).first()
+        cls.reader = User.objects.create_user("budget_reader", "reader@example.com", "pass")
+
+        # Make the busiest thread deeper and wider than the seed data does.
+        cls.busiest_post = Post.objects.filter(status="published").order_by("-featured", "-published_at").first()
+        parent = None
+        for depth in range(6):
+            parent = Comment.objects.create(post=cls.busiest_post, author=cls.reader, parent=parent, body=f"Level {depth}")
+            for i in range(8):
+                Comment.objects.create(post=cls.busiest_post, author=cls.reader, parent=parent, body=f"Reply {i}")
+        cls.busiest_comment = Comment.objects.filter(post=cls.busiest_post, parent__isnull=True).first()
+
+    @classmethod
+    def tearDownClass(cls):
+        viewcount.flush()
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def measure(self, url):
+        cache.clear()
+        singleton.clear_local()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self.client.get(url)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        return response, len(queries), elapsed_ms, queries
+
+    def check_budgets(self, budgets, label):
+        report = []
+        for name, url, max_queries, max_ms in budgets:
+            url = url(self) if callable(url) else url
+            with self.subTest(url=url, user=label):
+                response, count, elapsed_ms, queries = self.measure(url)
+                report.append(f"{label:>5} {url:<48} {response.status_code} {count:>4} queries {elapsed_ms:>8.1f} ms")
+                self.assertLess(response.status_code, 400, f"{url} returned {response.status_code}")
+                self.assertLessEqual(
+                    count, max_queries,
+                    f"{url} ran {count} queries (budget {max_queries}):\n"
+                    + "\n".join(q["sql"] for q in queries.captured_queries),
+                )
+                self.assertLessEqual(elapsed_ms, max_ms, f"{url} took {elapsed_ms:.0f} ms (budget {max_ms} ms)")
+        if os.environ.get("VIEW_BUDGET_REPORT"):
+            print("\n" + "\n".join(report))
+
+    def test_every_project_url_has_a_budget(self):
+        """The project's own URLs (not admin/allauth internals) all appear in BUDGETS."""
+        from django.urls import URLPattern, URLResolver, get_resolver
+
+        def names(patterns, namespace=None):
+            for p in patterns:
+                if isinstance(p, URLResolver):
+                    if p.namespace == "admin" or "allauth" in str(p.urlconf_name):
+                        continue
+                    ns = ":".join(filter(None, [namespace, p.namespace]))
+                    yield from names(p.url_patterns, ns or None)
+                elif isinstance(p, URLPattern) and p.name:
+                    yield f"{namespace}:{p.name}" if namespace else p.name
+
+        budgeted = {name for name, *_ in BUDGETS}
+        missing = set(names(get_resolver().url_patterns)) - budgeted - UNBUDGETED
+        self.assertFalse(missing, f"Add a budget for: {sorted(missing)}")
+
+    def test_anonymous_budgets(self):
+        self.check_budgets(BUDGETS, "anon")
+
+    def test_authenticated_budgets(self):
+        self.client.force_login(self.reader)
+        self.check_budgets(AUTHENTICATED_BUDGETS, "user")
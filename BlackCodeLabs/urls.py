@@ -15,13 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
 
 from Home import views as Home_views
 from Home.sitemaps import sitemaps
+from utils import sitemaps as sitemap_views
+from utils.media import serve_media
 
 urlpatterns = [
     path('devAdmin/', admin.site.urls),
@@ -31,10 +31,13 @@ urlpatterns = [
     path("Blogs/", include("Blogs.urls")),
     path("affiliate/", include(("Affiliate.urls", "affiliate"), namespace="affiliate")),
     path('robots.txt', Home_views.robots_txt, name='robots_txt'),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_views.index, {'sitemaps': sitemaps}, name='sitemap_index'),
+    path('sitemap-<section>.xml', sitemap_views.section, {'sitemaps': sitemaps},
+         name='django.contrib.sitemaps.views.sitemap'),
     path('', include('Home.urls')),
     path('auth/', include('Users.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.+)$", serve_media, name='media'),
+]
 
 handler400 = 'Home.views.error_400'
 handler403 = 'Home.views.error_403'
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Post, Category, Comment, ContactMessage
+from utils.moderation import screen_selected
 
 
 @admin.register(Category)
@@ -10,7 +11,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ("title", "category", "author", "status", "featured", "published_at")
+    list_display = ("title", "category", "author", "status", "featured", "view_count", "published_at")
     list_filter = ("status", "featured", "category")
     search_fields = ("title", "excerpt", "body")
     prepopulated_fields = {"slug": ("title",)}
@@ -25,12 +26,15 @@ class PostAdmin(admin.ModelAdmin):
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ("author", "post", "created_at")
+    list_display = ("author", "post", "created_at", "flagged", "flagged_words")
+    list_filter = ("flagged",)
     search_fields = ("body", "author__username")
+    actions = [screen_selected]
 
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ("subject", "name", "email", "created_at", "handled")
-    list_filter = ("handled",)
+    list_display = ("subject", "name", "email", "created_at", "handled", "flagged")
+    list_filter = ("handled", "flagged")
     search_fields = ("name", "email", "subject", "message")
+    actions = [screen_selected]
@@ -0,0 +1,79 @@
+"""
+Comment threads for the post detail page.
+
+CommentThread(post, user) loads every comment on a post with its author in
+one query, plus one query for the comments `user` has liked, and links them
+into a tree in memory. The query count stays the same however many comments
+or levels of replies a post has.
+
+Only part of the tree is rendered inline: REPLIES_PER_PAGE replies per
+comment, down to INLINE_DEPTH levels. The rest sits behind "show more"
+links served page by page by CommentRepliesView.
+"""
+from django.core.paginator import Paginator
+
+from .models import Comment
+
+INLINE_DEPTH = 3
+REPLIES_PER_PAGE = 5
+
+
+class CommentThread:
+
+    def __init__(self, post, user=None):
+        comments = list(
+            Comment.objects.filter(post=post).select_related("author").order_by("created_at", "pk")
+        )
+        liked = set()
+        if user is not None and user.is_authenticated:
+            liked = set(
+                Comment.likes.through.objects.filter(user_id=user.pk, comment__post=post)
+                .values_list("comment_id", flat=True)
+            )
+
+        self.by_id = {c.pk: c for c in comments}
+        self.roots = []
+        for c in comments:
+            c.children = []
+            c.is_liked = c.pk in liked
+        # Oldest first, so every reply list reads as a conversation.
+        for c in comments:
+            parent = self.by_id.get(c.parent_id)
+            (parent.children if parent else self.roots).append(c)
+        # Newest conversations on top, as before.
+        self.roots.reverse()
+
+        stack = [(c, 0) for c in self.roots]
+        while stack:
+            c, depth = stack.pop()
+            c.depth = depth
+            stack.extend((child, depth + 1) for child in c.children)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def top_level(self):
+        """Top-level comments, each prepared for rendering."""
+        self.prepare(self.roots)
+        return self.roots
+
+    def replies_page(self, comment_id, page_number):
+        """One page of the direct replies to `comment_id`, each prepared for rendering."""
+        parent = self.by_id[comment_id]
+        page = Paginator(parent.children, REPLIES_PER_PAGE).get_page(page_number)
+        self.prepare(page.object_list)
+        return parent, page
+
+    def prepare(self, comments, levels=INLINE_DEPTH):
+        """Set what each comment renders: `thread_replies` (shown inline),
+        `more_replies` (count behind the "show more" link) and
+        `next_replies_page` (the page that link loads)."""
+        for c in comments:
+            if levels > 0:
+                c.thread_replies = c.children[:REPLIES_PER_PAGE]
+                c.next_replies_page = 2
+                self.prepare(c.thread_replies, levels - 1)
+            else:
+                c.thread_replies = []
+                c.next_replies_page = 1
+            c.more_replies = len(c.children) - len(c.thread_replies)
@@ -597,6 +597,8 @@ class Command(BaseCommand):
                 num_likes = random.randint(15, 60)
                 liked_by = random.sample(users, min(num_likes, len(users)))
                 post.likes.add(*liked_by)
+                post.like_count = len(liked_by)
+                post.save(update_fields=["like_count"])
 
             posts.append(post)
             self.stdout.write(f"  📝 Created post: {post.title[:50]}...")
@@ -672,6 +674,8 @@ class Command(BaseCommand):
                 if random.random() < 0.3:
                     likers = random.sample(users, min(random.randint(1, 5), len(users)))
                     comment.likes.add(*likers)
+                    comment.like_count = len(likers)
+                    comment.save(update_fields=["like_count"])
 
         self.stdout.write(self.style.SUCCESS(f"  ✨ Created comments on {len(posts)} posts"))
 
@@ -0,0 +1,18 @@
+# Blogs/management/commands/recountlikes.py
+from django.core.management.base import BaseCommand
+
+from Blogs.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Repair Post/Comment like_count wherever it disagrees with the likes table'
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            fixed = model.recount_likes()
+            label = model._meta.verbose_name_plural
+            if fixed:
+                self.stdout.write(self.style.WARNING(f'Fixed like_count on {fixed} {label}'))
+            else:
+                self.stdout.write(f'All {label} already consistent')
+        self.stdout.write(self.style.SUCCESS('Done.'))
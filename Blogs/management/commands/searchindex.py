@@ -0,0 +1,16 @@
+# Blogs/management/commands/searchindex.py
+from django.core.management.base import BaseCommand
+
+from Blogs.search import SQLiteFTSBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the blog full-text search index from the Post table'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if not isinstance(backend, SQLiteFTSBackend):
+            self.stdout.write(f'{type(backend).__name__} searches the posts table directly; nothing to rebuild.')
+            return
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} post(s).'))
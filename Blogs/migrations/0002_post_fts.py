@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:12
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+FTS_TABLE = "Blogs_post_fts"
+
+
+def create_fts_table(apps, schema_editor):
+    """SQLite only: FTS5 index over posts (rowid = post id). Postgres searches
+    the columns directly, and a SQLite built without FTS5 falls back to
+    icontains, so both are left alone."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" '
+            f"USING fts5(title, excerpt, body, tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+        Post = apps.get_model("Blogs", "Post")
+        for post in Post.objects.only("title", "excerpt", "body").iterator(chunk_size=500):
+            cursor.execute(
+                f'INSERT INTO "{FTS_TABLE}" (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, post.excerpt, strip_tags(post.body)],
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{FTS_TABLE}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Blogs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_likes(apps, schema_editor):
+    for model_name in ('Post', 'Comment'):
+        model = apps.get_model('Blogs', model_name)
+        through = model.likes.through
+        fk = f'{model_name.lower()}_id'
+        likes = (
+            through.objects.filter(**{fk: OuterRef('pk')})
+            .values(fk).annotate(n=Count('pk')).values('n')
+        )
+        model.objects.update(like_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Blogs', '0002_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_existing_likes, migrations.RunPython.noop),
+    ]
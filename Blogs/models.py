@@ -1,10 +1,67 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
 
 
+class LikeCounterMixin:
+    """`likes` M2M plus a denormalised `like_count` column.
+
+    toggle_like() writes the through row and adjusts the counter with an
+    F() expression in one transaction, so concurrent likes never lose an
+    update and pages can read `like_count` instead of counting the M2M.
+    recount_likes() reconciles the column with the M2M table."""
+
+    # Maintained with F() updates; a plain save() of an existing row (an
+    # admin edit) must not write back the stale values it loaded.
+    COUNTER_FIELDS = ("like_count",)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def toggle_like(self, user):
+        """Like or unlike for `user`. Returns (liked, like_count)."""
+        through = self.likes.through
+        owner = {f"{self._meta.model_name}_id": self.pk}
+        model = type(self)
+        with transaction.atomic():
+            if through.objects.filter(user_id=user.pk, **owner).delete()[0]:
+                liked, delta = False, -1
+            else:
+                try:
+                    with transaction.atomic():
+                        through.objects.create(user_id=user.pk, **owner)
+                except IntegrityError:
+                    # A concurrent request from the same user got there first;
+                    # report (and keep) the count it left behind.
+                    self.refresh_from_db(fields=["like_count"])
+                    return True, self.like_count
+                liked, delta = True, 1
+            model.objects.filter(pk=self.pk).update(like_count=F("like_count") + delta)
+            count = model.objects.values_list("like_count", flat=True).get(pk=self.pk)
+        self.like_count = count
+        return liked, count
+
+    @classmethod
+    def recount_likes(cls, batch_size=500):
+        """Set like_count from the M2M table wherever they disagree. Returns the rows fixed."""
+        wrong = list(
+            cls.objects.annotate(actual=Count("likes"))
+            .exclude(like_count=F("actual"))
+            .values_list("pk", "actual")
+        )
+        rows = [cls(pk=pk, like_count=actual) for pk, actual in wrong]
+        cls.objects.bulk_update(rows, ["like_count"], batch_size=batch_size)
+        return len(rows)
+
+
 class Category(models.Model):
     name = models.CharField(max_length=60, unique=True)
     slug = models.SlugField(max_length=70, unique=True, blank=True)
@@ -22,7 +79,7 @@ class Category(models.Model):
         return self.name
 
 
-class Post(models.Model):
+class Post(LikeCounterMixin, models.Model):
     STATUS_CHOICES = [("draft", "Draft"), ("published", "Published")]
     title = models.CharField(max_length=220)
     slug = models.SlugField(max_length=240, unique=True, blank=True)
@@ -32,15 +89,28 @@ class Post(models.Model):
     body = models.TextField(help_text="Full post content (HTML allowed)")
     image = models.ImageField(upload_to="posts/", blank=True, null=True)
     image_url = models.URLField(blank=True, help_text="Optional fallback image URL")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     featured = models.BooleanField(default=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="published")
     read_minutes = models.PositiveSmallIntegerField(default=4)
     published_at = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="liked_posts", blank=True)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # view_count is buffered by Blogs.viewcount and flushed with F() updates.
+    COUNTER_FIELDS = ("like_count", "view_count")
+
+    # Resized/re-encoded off the request path, see utils/images.py
+    responsive_image_field = "image"
 
     class Meta:
         ordering = ["-published_at"]
+        indexes = [
+            models.Index(fields=["status", "-published_at"]),
+            models.Index(fields=["status", "featured", "-published_at"]),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -64,16 +134,26 @@ class Post(models.Model):
         return self.title
 
 
-class Comment(models.Model):
+class Comment(LikeCounterMixin, models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="comments")
     parent = models.ForeignKey("self", on_delete=models.CASCADE, null=True, blank=True, related_name="replies")
     body = models.TextField(max_length=2000)
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="liked_comments", blank=True)
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    flagged = models.BooleanField(default=False)
+    flagged_words = models.CharField(max_length=255, blank=True, editable=False)
+    screened_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    # Screened by utils.moderation
+    moderated_fields = ("body",)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["post", "parent", "created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.author} on {self.post}"
@@ -86,6 +166,11 @@ class ContactMessage(models.Model):
     message = models.TextField(max_length=4000)
     created_at = models.DateTimeField(auto_now_add=True)
     handled = models.BooleanField(default=False)
+    flagged = models.BooleanField(default=False)
+    flagged_words = models.CharField(max_length=255, blank=True, editable=False)
+    screened_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    moderated_fields = ("subject", "message")
 
     class Meta:
         ordering = ["-created_at"]
@@ -0,0 +1,197 @@
+"""
+Full-text search for blog posts.
+
+The backend is picked from the database vendor:
+
+* SQLite   - an FTS5 virtual table (`Blogs_post_fts`, rowid = post id) kept in
+             sync by Blogs.signals. Results are ranked with BM25 and every
+             search term is prefix-matched ("djan" finds "Django").
+* Postgres - tsvector/tsquery via django.contrib.postgres, ranked with
+             ts_rank and highlighted with ts_headline. Nothing to keep in sync.
+* Anything else (or SQLite built without FTS5) falls back to the old
+  title/excerpt/body icontains scan.
+
+All backends expose the same three calls used by the views and signals:
+`search(queryset, query)`, `snippets(query, post_ids)` and
+`index_post(post)` / `remove_post(post_id)`.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "Blogs_post_fts"
+
+# Column weights for BM25: a hit in the title counts far more than one in the body.
+TITLE_WEIGHT, EXCERPT_WEIGHT, BODY_WEIGHT = 10.0, 4.0, 1.0
+
+# Sentinels placed around matches by snippet() so the surrounding text can be
+# escaped before they are turned into <mark> tags.
+_HL_START, _HL_END = "\x02", "\x03"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _highlight(text):
+    return mark_safe(escape(text).replace(_HL_START, "<mark>").replace(_HL_END, "</mark>"))
+
+
+class BasicSearchBackend:
+    """icontains over title, excerpt and body (a full scan; used when nothing better exists)."""
+
+    def search(self, queryset, query):
+        return queryset.filter(Q(title__icontains=query) | Q(excerpt__icontains=query) | Q(body__icontains=query))
+
+    def snippets(self, query, post_ids):
+        return {}
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTSBackend(BasicSearchBackend):
+
+    @staticmethod
+    def match_expression(query):
+        """User input -> FTS5 query: every word must appear, each as a prefix.
+        Words are quoted, so FTS operators typed by users are taken literally."""
+        terms = _TERM_RE.findall(query)
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+        # Join the FTS table on rowid so MATCH runs once and bm25() is read
+        # off the joined row (a correlated rank subquery re-ran it per post).
+        post_table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'"{FTS_TABLE}" MATCH %s', f'"{FTS_TABLE}".rowid = "{post_table}"."id"'],
+            params=[match],
+            select={"search_rank": f'bm25("{FTS_TABLE}", %s, %s, %s)'},
+            select_params=(TITLE_WEIGHT, EXCERPT_WEIGHT, BODY_WEIGHT),
+        ).order_by("search_rank", "-published_at")  # bm25() is lower-is-better
+
+    def snippets(self, query, post_ids):
+        """{post_id: highlighted excerpt of the body around the matches}"""
+        match = self.match_expression(query)
+        if not match or not post_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet("{FTS_TABLE}", -1, %s, %s, %s, 24) FROM "{FTS_TABLE}" '
+                f'WHERE "{FTS_TABLE}" MATCH %s AND rowid IN ({placeholders})',
+                [_HL_START, _HL_END, "…", match, *post_ids],
+            )
+            return {rowid: _highlight(text) for rowid, text in cursor.fetchall()}
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO "{FTS_TABLE}" (rowid, title, excerpt, body) VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, post.excerpt, strip_tags(post.body)],
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}" WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        from .models import Post
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{FTS_TABLE}"')
+        count = 0
+        for post in Post.objects.only("title", "excerpt", "body").iterator(chunk_size=500):
+            self.index_post(post)
+            count += 1
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES (\'optimize\')')
+        return count
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+
+    @staticmethod
+    def _query(query):
+        from django.contrib.postgres.search import SearchQuery
+
+        terms = _TERM_RE.findall(query)
+        if not terms:
+            return None
+        return SearchQuery(" & ".join(f"{term}:*" for term in terms), search_type="raw", config="english")
+
+    @staticmethod
+    def _vector():
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector("title", weight="A", config="english")
+            + SearchVector("excerpt", weight="B", config="english")
+            + SearchVector("body", weight="D", config="english")
+        )
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchRank
+
+        search_query = self._query(query)
+        if search_query is None:
+            return queryset.none()
+        return (
+            queryset.annotate(search_vector=self._vector())
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(self._vector(), search_query))
+            .order_by("-search_rank", "-published_at")
+        )
+
+    def snippets(self, query, post_ids):
+        from django.contrib.postgres.search import SearchHeadline
+        from .models import Post
+
+        search_query = self._query(query)
+        if search_query is None or not post_ids:
+            return {}
+        rows = Post.objects.filter(pk__in=post_ids).annotate(
+            headline=SearchHeadline(
+                "body", search_query, config="english",
+                start_sel=_HL_START, stop_sel=_HL_END, max_words=30, min_words=15,
+            )
+        ).values_list("pk", "headline")
+        return {pk: _highlight(strip_tags(text)) for pk, text in rows}
+
+
+def fts5_table_exists():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == "sqlite" and fts5_table_exists():
+            _backend = SQLiteFTSBackend()
+        elif connection.vendor == "postgresql":
+            _backend = PostgresSearchBackend()
+        else:
+            if connection.vendor == "sqlite":
+                logger.warning(f"{FTS_TABLE} is missing (run migrations); blog search falls back to icontains")
+            _backend = BasicSearchBackend()
+    return _backend
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.singleflight import invalidate
+
+from .models import Category, Comment, Post
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Keep the full-text index in step with the post."""
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_sidebar(sender, **kwargs):
+    """Post count, popular posts or category counts may have changed."""
+    from .views import SIDEBAR_CACHE_KEY
+    invalidate(SIDEBAR_CACHE_KEY)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_sidebar_comment_count(sender, signal, created=False, **kwargs):
+    """Adjust the cached comment count in place rather than recounting."""
+    from .views import SIDEBAR_COMMENT_COUNT_KEY
+    if signal is post_save and not created:
+        return
+
+    def adjust():
+        try:
+            if signal is post_delete:
+                cache.decr(SIDEBAR_COMMENT_COUNT_KEY)
+            else:
+                cache.incr(SIDEBAR_COMMENT_COUNT_KEY)
+        except ValueError:
+            pass  # not cached yet; the next page view counts from scratch
+
+    transaction.on_commit(adjust)  # a rolled-back comment must not count
@@ -57,6 +57,22 @@ document.addEventListener('DOMContentLoaded', () => {
     });
   }
 
+  // Comment threads: load further replies in place
+  document.addEventListener('click', async (e) => {
+    const more = e.target.closest('[data-more-replies]');
+    if(!more) return;
+    e.preventDefault();
+    more.classList.add('loading');
+    try{
+      const res = await fetch(more.href, {headers:{'X-Requested-With':'XMLHttpRequest'}});
+      if(!res.ok) throw new Error(res.status);
+      more.insertAdjacentHTML('beforebegin', await res.text());
+      more.remove();
+    }catch(err){
+      more.classList.remove('loading');
+    }
+  });
+
   // TOC scrollspy
   const links = document.querySelectorAll('.toc a');
   if(links.length){
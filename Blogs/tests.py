@@ -1,3 +1,342 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from PIL import Image
+
+from django.db import IntegrityError, connection
+from django.db.models.query import QuerySet
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.html import escape
+from unittest import mock, skipUnless
+
+from utils import censorship, images, moderation
+
+from . import viewcount
+from .models import Category, Comment, Post
+from .search import SQLiteFTSBackend, fts5_table_exists
+from .views import SIDEBAR_CACHE_KEY, SIDEBAR_COMMENT_COUNT_KEY, sidebar_context
+
+
+@skipUnless(connection.vendor == "sqlite", "plans are asserted in SQLite's EXPLAIN QUERY PLAN format")
+class BlogIndexUsageTests(TestCase):
+    """The hot blog queries must be answered from an index, not a table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("author", "author@example.com", "x")
+        cls.post = Post.objects.create(title="Hello", author=author, excerpt="e", body="b")
+        cls.comment = Comment.objects.create(post=cls.post, author=author, body="c")
+
+    def assertUsesIndex(self, queryset, table):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf"(SEARCH|SCAN) {table} USING (COVERING )?INDEX", plan)
+        self.assertNotRegex(plan, rf"SCAN {table}\s*$", plan)
+
+    def test_published_post_list(self):
+        self.assertUsesIndex(Post.objects.filter(status="published"), "Blogs_post")
+
+    def test_published_post_list_needs_no_sort(self):
+        self.assertNotIn("TEMP B-TREE", Post.objects.filter(status="published").explain())
+
+    def test_featured_post(self):
+        qs = Post.objects.filter(status="published", featured=True)[:1]
+        self.assertUsesIndex(qs, "Blogs_post")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+    def test_comment_thread(self):
+        self.assertUsesIndex(Comment.objects.filter(post=self.post).order_by("created_at", "pk"), "Blogs_comment")
+
+    def test_comment_replies(self):
+        qs = Comment.objects.filter(post=self.post, parent=self.comment).order_by("created_at")
+        self.assertUsesIndex(qs, "Blogs_comment")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+
+class SidebarCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", "author@example.com", "x")
+        cls.first = Post.objects.create(title="First", author=cls.author, excerpt="e", body="b")
+        cls.second = Post.objects.create(title="Second", author=cls.author, excerpt="e", body="b")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_category_change_rebuilds_after_commit(self):
+        self.assertEqual(sidebar_context()["all_categories"], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Events", slug="events")
+            self.assertEqual(sidebar_context()["all_categories"], [])
+        self.assertEqual([c.name for c in sidebar_context()["all_categories"]], ["Events"])
+
+    def test_view_flush_reranks_popular_posts(self):
+        self.assertIsNotNone(sidebar_context())
+        viewcount._pending[self.first.pk] += 5
+        with self.captureOnCommitCallbacks(execute=True):
+            viewcount.flush()
+        self.assertIsNone(cache.get(SIDEBAR_CACHE_KEY))
+        self.assertEqual(sidebar_context()["popular_posts"][0], self.first)
+
+    def test_comment_count_adjusted_on_commit(self):
+        self.assertEqual(sidebar_context()["author_comment_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.first, author=self.author, body="c")
+            self.assertEqual(cache.get(SIDEBAR_COMMENT_COUNT_KEY), 0)
+        self.assertEqual(cache.get(SIDEBAR_COMMENT_COUNT_KEY), 1)
+
+
+class CounterFieldTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("author", "author@example.com", "x")
+        cls.reader = User.objects.create_user("reader", "reader@example.com", "x")
+        cls.post = Post.objects.create(title="Post", author=cls.author, excerpt="e", body="b")
+        cls.comment = Comment.objects.create(post=cls.post, author=cls.author, body="c")
+
+    def test_saving_stale_comment_keeps_like_count(self):
+        stale = Comment.objects.get(pk=self.comment.pk)  # e.g. open in the admin
+        self.comment.toggle_like(self.reader)
+        stale.flagged = True
+        stale.save()
+        self.comment.refresh_from_db()
+        self.assertEqual((self.comment.like_count, self.comment.flagged), (1, True))
+
+    def test_concurrent_double_like_refreshes_count(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(like_count=3)
+        with mock.patch.object(Post.likes.through.objects, "create", side_effect=IntegrityError):
+            self.assertEqual(stale.toggle_like(self.reader), (True, 3))
+        self.assertEqual(stale.like_count, 3)
+
+    def test_saving_stale_post_keeps_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.post.toggle_like(self.reader)
+        Post.objects.filter(pk=self.post.pk).update(view_count=7)
+        stale.title = "Edited"
+        stale.save()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.view_count, self.post.title), (1, 7, "Edited"))
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite FTS5 backend")
+class FTSSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        if not fts5_table_exists():
+            return
+        author = User.objects.create_user("author", "author@example.com", "x")
+        cls.body_hit = Post.objects.create(title="Notes", author=author, excerpt="e", body="We use Django daily")
+        cls.title_hit = Post.objects.create(title="Django tips", author=author, excerpt="e", body="b")
+        Post.objects.create(title="Flask", author=author, excerpt="e", body="b")
+
+    def setUp(self):
+        if not fts5_table_exists():
+            self.skipTest("SQLite built without FTS5")
+
+    def search(self, query):
+        return SQLiteFTSBackend().search(Post.objects.select_related("author"), query)
+
+    def test_title_hits_rank_first(self):
+        self.assertEqual(list(self.search("djan")), [self.title_hit, self.body_hit])
+        self.assertEqual(self.search("djan").count(), 2)
+
+    def test_match_runs_once(self):
+        sql = str(self.search("django").query)
+        self.assertEqual(sql.count("MATCH"), 1, sql)
+        self.assertNotIn("SELECT bm25", sql)
+
+    def test_search_page(self):
+        response = self.client.get(reverse("blog:list"), {"q": "django"})
+        self.assertEqual(list(response.context["posts"]), [self.title_hit, self.body_hit])
+
+
+class CensorshipMatcherTests(SimpleTestCase):
+    """utils.censorship.Matcher, which moderation runs over every comment."""
+
+    def setUp(self):
+        self.matcher = censorship.Matcher(censorship.DEFAULT_WORDS)
+
+    def test_cases(self):
+        cases = [
+            # text, censored, found
+            ("sh1t", "s***", ["sh1t"]),                              # leetspeak
+            ("a55", "a**", ["a55"]),
+            ("s3x", "s**", ["s3x"]),
+            ("$h!t happens", "$*** happens", ["$h!t"]),              # lookalikes
+            ("b!tch", "b****", ["b!tch"]),
+            ("F*CK this", "F*** this", ["f*ck"]),                    # listed masked spelling
+            ("Sh1T", "S***", ["sh1t"]),                              # casing kept
+            ("Fuck, SHIT and f**k", "F***, S*** and f***", ["fuck", "shit", "f**k"]),
+            ("shit!", "s***!", ["shit"]),                            # trailing punctuation
+            ("seks?", "s***?", ["seks"]),
+            ("class assessment passes", "class assessment passes", []),  # no hits inside words
+            ("Sussex dickens Scunthorpe", "Sussex dickens Scunthorpe", []),
+            ("fvck_ shitty", "fvck_ shitty", []),
+            ("", "", []),
+        ]
+        for text, censored, found in cases:
+            with self.subTest(text=text):
+                self.assertEqual(self.matcher.censor(text), (not found, censored, found))
+
+    def test_single_pass(self):
+        self.matcher.pattern = mock.Mock(wraps=self.matcher.pattern)
+        with mock.patch.object(censorship, "normalise", wraps=censorship.normalise) as normalise:
+            self.matcher.censor("sh1t " * 500 + "b!tch")
+        self.matcher.pattern.finditer.assert_called_once()
+        normalise.assert_called_once()
+
+    def test_empty_word_list_censors_nothing(self):
+        self.assertEqual(censorship.Matcher({}).censor("sh1t"), (True, "sh1t", []))
+
+
+class ModerationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "x")
+        cls.post = Post.objects.create(title="Post", author=cls.admin, excerpt="e", body="b")
+        bodies = ["Great post", "this is sh1t", "thanks", "F*CK yes, shit", "see you"]
+        cls.comments = [Comment.objects.create(post=cls.post, author=cls.admin, body=body) for body in bodies]
+
+    def verdicts(self):
+        return list(Comment.objects.order_by("pk").values_list("flagged", "flagged_words"))
+
+    expected = [(False, ""), (True, "sh1t"), (False, ""), (True, "f*ck, shit"), (False, "")]
+
+    def test_screens_in_process(self):
+        self.assertEqual(moderation.moderate(Comment.objects.all(), chunk_size=2, workers=0), (5, 2))
+        self.assertEqual(self.verdicts(), self.expected)
+        self.assertFalse(Comment.objects.filter(screened_at__isnull=True).exists())
+
+    def test_chunks_are_spread_over_the_pool(self):
+        submitted = []
+
+        class Pool(ThreadPoolExecutor):  # same process, so submissions can be recorded
+            def submit(self, fn, rows):
+                submitted.append([pk for pk, *_ in rows])
+                return super().submit(fn, rows)
+
+        with mock.patch.object(moderation, "ProcessPoolExecutor", Pool):
+            self.assertEqual(moderation.moderate(Comment.objects.all(), chunk_size=2, workers=1), (5, 2))
+        pks = [c.pk for c in self.comments]
+        self.assertEqual(submitted, [pks[0:2], pks[2:4], pks[4:]])
+        self.assertEqual(self.verdicts(), self.expected)
+
+    def test_worker_process(self):
+        self.assertEqual(moderation.moderate(Comment.objects.all(), chunk_size=2, workers=1), (5, 2))
+        self.assertEqual(self.verdicts(), self.expected)
+
+    def test_bulk_update_writes_only_changed_rows(self):
+        with mock.patch.object(QuerySet, "bulk_update", autospec=True, side_effect=QuerySet.bulk_update) as bulk:
+            moderation.moderate(Comment.objects.all(), workers=0)
+            self.assertEqual([obj.pk for obj in bulk.call_args.args[1]], [self.comments[1].pk, self.comments[3].pk])
+
+            bulk.reset_mock()
+            moderation.moderate(Comment.objects.all(), workers=0, rescan=True)
+            bulk.assert_not_called()  # same verdicts
+
+    def test_rescan(self):
+        moderation.moderate(Comment.objects.all(), workers=0)
+        Comment.objects.filter(pk=self.comments[0].pk).update(body="b!tch")
+
+        self.assertEqual(moderation.moderate(Comment.objects.all(), workers=0), (0, 0))  # already screened
+        self.assertFalse(Comment.objects.get(pk=self.comments[0].pk).flagged)
+
+        self.assertEqual(moderation.moderate(Comment.objects.all(), workers=0, rescan=True), (5, 3))
+        self.assertEqual(Comment.objects.get(pk=self.comments[0].pk).flagged_words, "b!tch")
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:Blogs_comment_changelist"),
+            {"action": "screen_selected", "_selected_action": [self.comments[1].pk, self.comments[2].pk]},
+            follow=True,
+        )
+        self.assertContains(response, "Screened 2; 1 flagged.")
+        self.assertEqual(
+            list(Comment.objects.filter(screened_at__isnull=False).order_by("pk").values_list("pk", "flagged")),
+            [(self.comments[1].pk, True), (self.comments[2].pk, False)],
+        )
+
+
+class ResponsiveImageTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name, IMAGE_VARIANTS_IN_PROCESS=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.author = User.objects.create_user("author", "author@example.com", "x")
+
+    def post_with_image(self, size=(1200, 600), color="red"):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color).save(buffer, "JPEG")
+        post = Post.objects.create(title="Pictured", author=self.author, excerpt="e", body="b")
+        post.image.save("hero.jpg", ContentFile(buffer.getvalue()))
+        return post
+
+    def picture(self, post):
+        return Template(
+            '{% load responsive %}{% picture post.image src=post.cover alt=post.title sizes="50vw" %}'
+        ).render(Context({"post": post}))
+
+    def test_derivatives_at_each_width_and_format(self):
+        post = self.post_with_image()
+        self.assertTrue(images.process("Blogs.Post", post.pk))
+        post.refresh_from_db()
+        record = post.image_variants
+        self.assertEqual((record["source"], record["width"], record["height"]), (post.image.name, 1200, 600))
+        self.assertEqual(list(record["variants"]), images.available_formats())
+        for fmt, entries in record["variants"].items():
+            self.assertEqual([width for width, _ in entries], [480, 960, 1200])  # none wider than the original
+            for width, name in entries:
+                with default_storage.open(name) as fh, Image.open(fh) as img:
+                    self.assertEqual((img.format.lower(), img.size), (fmt, (width, width // 2)))
+        self.assertFalse(images.process("Blogs.Post", post.pk))  # already recorded
+
+    def test_same_bytes_are_encoded_once(self):
+        first = self.post_with_image()
+        images.process("Blogs.Post", first.pk)
+        second = self.post_with_image()
+        with mock.patch.object(default_storage, "save", wraps=default_storage.save) as save:
+            images.process("Blogs.Post", second.pk)
+        save.assert_not_called()
+        second.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual(second.image_variants["variants"], first.image_variants["variants"])
+
+    def test_picture_with_derivatives(self):
+        post = self.post_with_image()
+        images.process("Blogs.Post", post.pk)
+        post.refresh_from_db()
+        html = self.picture(post)
+        jpeg = post.image_variants["variants"]["jpeg"]
+        self.assertTrue(html.startswith("<picture>"), html)
+        if "webp" in images.available_formats():
+            self.assertIn('<source type="image/webp"', html)
+        self.assertIn(f'<img src="{default_storage.url(jpeg[-1][1])}"', html)
+        self.assertIn(f"{default_storage.url(jpeg[0][1])} 480w", html)
+        self.assertIn('sizes="50vw" alt="Pictured">', html)
+
+    def test_picture_falls_back_to_plain_img(self):
+        post = self.post_with_image()  # not processed yet
+        self.assertEqual(self.picture(post), f'<img src="{post.image.url}" alt="Pictured">')
+
+        without_image = Post.objects.create(title="Plain", author=self.author, excerpt="e", body="b")
+        self.assertEqual(self.picture(without_image), f'<img src="{escape(without_image.cover())}" alt="Plain">')
+
+    def test_post_detail_hero_without_image(self):
+        post = Post.objects.create(title="Plain", author=self.author, excerpt="e", body="b")
+        response = self.client.get(post.get_absolute_url())
+        self.assertContains(response, f'<img src="{escape(post.cover())}" alt="Plain" loading="eager">', html=False)
@@ -10,5 +10,6 @@ urlpatterns = [
     path("post/<slug:slug>/", views.PostDetailView.as_view(), name="detail"),
     path("post/<slug:slug>/comment/", views.CommentCreateView.as_view(), name="comment_create"),
     path("post/<slug:slug>/like/", views.PostLikeView.as_view(), name="post_like"),
+    path("comment/<int:pk>/replies/", views.CommentRepliesView.as_view(), name="comment_replies"),
     path("comment/<int:pk>/like/", views.CommentLikeView.as_view(), name="comment_like"),
 ]
@@ -1,20 +1,54 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.http import JsonResponse, HttpResponseRedirect
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, View, TemplateView
 
+from utils.keyset import CursorPaginationMixin
+from utils.singleflight import get_or_build
+
 from .models import Post, Category, Comment
 from .forms import CommentForm, ContactForm
+from .comments import CommentThread
+from .search import get_search_backend
+from .viewcount import pending_views, record_view
+
+
+SIDEBAR_CACHE_KEY = "blog:sidebar"
+SIDEBAR_COMMENT_COUNT_KEY = "blog:sidebar:comment-count"
 
 
-class PostListView(ListView):
+def build_sidebar_context():
+    """Site-wide sidebar figures - the same for every post and visitor. Cached
+    by sidebar_context() and invalidated by Blogs.signals when posts or
+    categories change, and by Blogs.viewcount.flush() when views move the
+    popular-post ranking."""
+    return {
+        'author_post_count': Post.objects.count(),
+        'popular_posts': list(Post.objects.filter(status='published').order_by('-view_count', '-published_at')[:5]),
+        'all_categories': list(Category.objects.annotate(post_count=Count('posts'))),
+    }
+
+
+def sidebar_context():
+    timeout = getattr(settings, 'BLOG_SIDEBAR_CACHE_TIMEOUT', 60 * 60)
+    context = dict(get_or_build(SIDEBAR_CACHE_KEY, build_sidebar_context, timeout=timeout))
+    # Kept separately so new comments can bump it in place (Blogs.signals)
+    # instead of throwing the rest of the sidebar away.
+    context['author_comment_count'] = get_or_build(SIDEBAR_COMMENT_COUNT_KEY, Comment.objects.count, timeout=timeout)
+    return context
+
+
+class PostListView(CursorPaginationMixin, ListView):
     model = Post
     template_name = "blog/post_list.html"
     context_object_name = "posts"
     paginate_by = 9
+    # ?cursor= switches to keyset pagination (date order, even for searches)
+    cursor_ordering = ("-published_at", "-id")
 
     def get_queryset(self):
         qs = Post.objects.filter(status="published").select_related("category", "author")
@@ -23,11 +57,18 @@ class PostListView(ListView):
         if cat and cat != "all":
             qs = qs.filter(category__slug=cat)
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(excerpt__icontains=q) | Q(body__icontains=q))
+            qs = get_search_backend().search(qs, q)
         return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        q = self.request.GET.get("q")
+        if q:
+            # Highlight only the rows on this page, not the whole result set
+            posts = ctx["object_list"]
+            snippets = get_search_backend().snippets(q, [p.pk for p in posts])
+            for p in posts:
+                p.search_snippet = snippets.get(p.pk)
         ctx["featured"] = Post.objects.filter(status="published", featured=True).first()
         ctx["active_category"] = self.request.GET.get("category", "all")
         ctx["query"] = self.request.GET.get("q", "")
@@ -44,20 +85,24 @@ class PostDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        record_view(self.request, self.object)
+        self.object.view_count += pending_views(self.object.pk)
         ctx["comment_form"] = CommentForm()
-        ctx["comments"] = self.object.comments.filter(parent__isnull=True).select_related("author").prefetch_related("replies__author")
+        thread = CommentThread(self.object, self.request.user)
+        ctx["comments"] = thread.top_level()
+        ctx["comment_count"] = len(thread)
         ctx["related"] = Post.objects.filter(status="published").exclude(pk=self.object.pk)[:3]
         ctx["liked"] = self.request.user.is_authenticated and self.object.likes.filter(pk=self.request.user.pk).exists()
-        context = {
-        # Sidebar data
-        'author_post_count': Post.objects.count(),
-        'author_comment_count': Comment.objects.count(),
-        'popular_posts': Post.objects.filter(status='published')[:5],
-        'all_categories': Category.objects.annotate(post_count=Count('posts')),
-        }
-        ctx.update(context)
+        ctx.update(sidebar_context())
         return ctx
 
+    @staticmethod
+    def page_cache_hit(request, slug):
+        """Served from utils.pagecache: the view still counts."""
+        post_id = Post.objects.filter(slug=slug, status="published").values_list("pk", flat=True).first()
+        if post_id:
+            record_view(request, Post(pk=post_id))
+
 
 class CommentCreateView(LoginRequiredMixin, View):
     def post(self, request, slug):
@@ -80,28 +125,34 @@ class CommentCreateView(LoginRequiredMixin, View):
         return redirect(post.get_absolute_url() + "#comments")
 
 
+class CommentRepliesView(View):
+    """A page of replies under one comment, as an HTML fragment for "show more"."""
+
+    def get(self, request, pk):
+        comment = get_object_or_404(Comment.objects.select_related("post"), pk=pk, post__status="published")
+        thread = CommentThread(comment.post, request.user)
+        parent, page = thread.replies_page(comment.pk, request.GET.get("page"))
+        return render(request, "blog/_comment_replies.html", {
+            "post": comment.post,
+            "parent": parent,
+            "replies": page.object_list,
+            "page": page,
+            "more_replies": len(parent.children) - page.end_index(),
+        })
+
+
 class PostLikeView(LoginRequiredMixin, View):
     def post(self, request, slug):
-        post = get_object_or_404(Post, slug=slug, status="published")
-        if post.likes.filter(pk=request.user.pk).exists():
-            post.likes.remove(request.user)
-            liked = False
-        else:
-            post.likes.add(request.user)
-            liked = True
-        return JsonResponse({"liked": liked, "count": post.likes.count()})
+        post = get_object_or_404(Post.objects.only("pk"), slug=slug, status="published")
+        liked, count = post.toggle_like(request.user)
+        return JsonResponse({"liked": liked, "count": count})
 
 
 class CommentLikeView(LoginRequiredMixin, View):
     def post(self, request, pk):
-        c = get_object_or_404(Comment, pk=pk)
-        if c.likes.filter(pk=request.user.pk).exists():
-            c.likes.remove(request.user)
-            liked = False
-        else:
-            c.likes.add(request.user)
-            liked = True
-        return JsonResponse({"liked": liked, "count": c.likes.count()})
+        c = get_object_or_404(Comment.objects.only("pk"), pk=pk)
+        liked, count = c.toggle_like(request.user)
+        return JsonResponse({"liked": liked, "count": count})
 
 
 class ContactView(CreateView):
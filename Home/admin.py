@@ -4,10 +4,12 @@ from .models import (
     TechServices, DataCounter,
     ClientReview, ContactInquiry, Solution,
     PricingPlan, PricingFeature, PricingFAQ,
-    PortfolioProject,
+    PortfolioProject, OutboundEmail, BlockedWord,
 )
 from django.utils import timezone
 from django.utils.safestring import mark_safe
+from .signals import invalidate_homepage_context
+from utils.moderation import screen_selected
 
 @admin.register(TechServices)
 class TechServicesAdmin(admin.ModelAdmin):
@@ -59,11 +61,14 @@ class DataCounterAdmin(admin.ModelAdmin):
 
     def activate_counters(self, request, queryset):
         queryset.update(is_active=True)
+        # .update() skips post_save, so drop the cached homepage context here
+        invalidate_homepage_context(DataCounter)
         self.message_user(request, f'{queryset.count()} counter(s) activated.')
     activate_counters.short_description = "Activate selected counters"
 
     def deactivate_counters(self, request, queryset):
         queryset.update(is_active=False)
+        invalidate_homepage_context(DataCounter)
         self.message_user(request, f'{queryset.count()} counter(s) deactivated.')
     deactivate_counters.short_description = "Deactivate selected counters"
 
@@ -129,10 +134,10 @@ admin.site.index_title = "Welcome to Company Administration"
 
 @admin.register(ContactInquiry)
 class ContactInquiryAdmin(admin.ModelAdmin):
-    list_display = ('full_name', 'email', 'subject', 'status', 'created_at')
-    list_filter = ('status', 'created_at')
+    list_display = ('full_name', 'email', 'subject', 'status', 'flagged', 'created_at')
+    list_filter = ('status', 'flagged', 'created_at')
     search_fields = ('first_name', 'last_name', 'email', 'subject', 'message')
-    readonly_fields = ('created_at', 'updated_at', 'ip_address', 'user_agent', 'referrer')
+    readonly_fields = ('created_at', 'updated_at', 'ip_address', 'user_agent', 'referrer', 'flagged_words', 'screened_at')
 
     fieldsets = (
         ('Contact Information', {
@@ -144,6 +149,9 @@ class ContactInquiryAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('status', 'priority')
         }),
+        ('Moderation', {
+            'fields': ('flagged', 'flagged_words', 'screened_at')
+        }),
         ('Technical Information', {
             'fields': ('ip_address', 'user_agent', 'referrer'),
             'classes': ('collapse',)
@@ -159,7 +167,7 @@ class ContactInquiryAdmin(admin.ModelAdmin):
     full_name.short_description = 'Name'
 
     # Simple actions without complex HTML
-    actions = ['mark_as_new', 'mark_as_responded', 'mark_as_closed']
+    actions = ['mark_as_new', 'mark_as_responded', 'mark_as_closed', screen_selected]
 
     def mark_as_new(self, request, queryset):
         updated = queryset.update(status='new')
@@ -244,3 +252,32 @@ class PortfolioProjectAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_active', 'is_featured')
     search_fields = ('title', 'client_name', 'summary')
     prepopulated_fields = {'slug': ('title',)}
+
+
+# ---------------------------------------------------------------------------
+# EMAIL OUTBOX
+# ---------------------------------------------------------------------------
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipient_list', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients', 'body')
+    readonly_fields = ('attempts', 'last_error', 'locked_at', 'sent_at', 'created_at', 'updated_at')
+    actions = ['retry_now']
+
+    def recipient_list(self, obj):
+        return ", ".join(obj.recipients)
+    recipient_list.short_description = 'To'
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now(), locked_at=None)
+        self.message_user(request, f'{updated} email(s) queued for immediate retry.')
+    retry_now.short_description = "Retry selected emails now"
+
+
+@admin.register(BlockedWord)
+class BlockedWordAdmin(admin.ModelAdmin):
+    list_display = ('word', 'variants', 'is_active', 'created_at')
+    list_editable = ('variants', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('word', 'variants')
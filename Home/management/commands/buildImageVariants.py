@@ -0,0 +1,55 @@
+# Home/management/commands/buildImageVariants.py
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from utils import images
+
+
+class Command(BaseCommand):
+    help = 'Build missing responsive image derivatives (AVIF/WebP/JPEG) for uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild the records of every row, not only rows whose upload changed',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete derivative files no row refers to any more',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Formats: {', '.join(images.available_formats())}")
+        for model in images.responsive_models():
+            field = model.responsive_image_field
+            built = 0
+            rows = model.objects.only('pk', field, images.VARIANTS_FIELD).order_by('pk')
+            for row in rows.iterator(chunk_size=200):
+                if options['force'] or images.needs_variants(row):
+                    built += images.process(model._meta.label, row.pk, force=options['force'])
+            self.stdout.write(f'{model._meta.label}: {built} rows updated')
+
+        if options['prune']:
+            self.prune()
+
+    def prune(self):
+        referenced = set()
+        for model in images.responsive_models():
+            for record in model.objects.exclude(**{images.VARIANTS_FIELD: {}}).values_list(images.VARIANTS_FIELD, flat=True):
+                for entries in record.get('variants', {}).values():
+                    referenced.update(name for _, name in entries)
+
+        removed = 0
+        if default_storage.exists(images.DERIVATIVES_DIR):
+            for bucket in default_storage.listdir(images.DERIVATIVES_DIR)[0]:
+                directory = os.path.join(images.DERIVATIVES_DIR, bucket)
+                for filename in default_storage.listdir(directory)[1]:
+                    name = f'{images.DERIVATIVES_DIR}/{bucket}/{filename}'
+                    if name not in referenced:
+                        default_storage.delete(name)
+                        removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Pruned {removed} unreferenced derivative files'))
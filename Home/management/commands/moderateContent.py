@@ -0,0 +1,57 @@
+# Home/management/commands/moderateContent.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.moderation import moderate, moderated_models
+
+
+class Command(BaseCommand):
+    help = 'Screen comments and contact messages for profanity and record the flags (utils.moderation)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help='Models to screen as app_label.Model (default: every moderated model)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows read, screened and written back per chunk',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Worker processes (default: one per CPU; 0 screens in this process)',
+        )
+        parser.add_argument(
+            '--rescan',
+            action='store_true',
+            help='Screen rows that were already screened too, e.g. after editing the word list',
+        )
+
+    def handle(self, *args, **options):
+        available = {m._meta.label.lower(): m for m in moderated_models()}
+        if options['models']:
+            try:
+                models = [available[label.lower()] for label in options['models']]
+            except KeyError as e:
+                raise CommandError(f"{e.args[0]} is not moderated; choose from {', '.join(sorted(available))}")
+        else:
+            models = list(available.values())
+
+        for model in models:
+            start = time.monotonic()
+            screened, flagged = moderate(
+                model.objects.all(),
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                rescan=options['rescan'],
+            )
+            self.stdout.write(
+                f'{model._meta.label}: screened {screened}, flagged {flagged} '
+                f'({time.monotonic() - start:.1f}s)'
+            )
@@ -0,0 +1,17 @@
+# Home/management/commands/pruneQRCache.py
+from django.core.management.base import BaseCommand
+
+from Home.qr import qr_cache
+
+
+class Command(BaseCommand):
+    help = 'Trim the on-disk QR code cache (QR_CACHE_DIR) to QR_CACHE_MAX_FILE_AGE and QR_CACHE_MAX_BYTES'
+
+    def handle(self, *args, **options):
+        if not qr_cache.directory:
+            self.stdout.write('QR_CACHE_DIR is not set; nothing to prune.')
+            return
+        removed, size = qr_cache.prune()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {removed} file(s); {size / (1024 * 1024):.1f} MB left in {qr_cache.directory}'
+        ))
@@ -0,0 +1,141 @@
+# Home/management/commands/sendQueuedEmail.py
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Home.models import OutboundEmail
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound email (Home.OutboundEmail) in batches over one SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Maximum number of emails to send per batch',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=6,
+            help='Give up on an email (status "failed") after this many attempts',
+        )
+        parser.add_argument(
+            '--backoff',
+            type=int,
+            default=60,
+            help='Base retry delay in seconds; doubles after every failed attempt',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling the outbox every --interval seconds when it is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='Seconds to sleep between polls in --loop mode',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Every pass, not just at startup: a worker can die at any time.
+            self.release_stale_claims()
+            sent, failed = self.send_batch(options)
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+
+            if not options['loop']:
+                break
+            # Go straight to the next batch while there is a backlog.
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
+
+        remaining = OutboundEmail.objects.filter(status='pending').count()
+        self.stdout.write(self.style.SUCCESS(f'Done. {remaining} email(s) still pending.'))
+
+    def release_stale_claims(self):
+        """Put back emails claimed by a worker that died mid-batch."""
+        cutoff = timezone.now() - timedelta(minutes=15)
+        released = OutboundEmail.objects.filter(status='sending', locked_at__lt=cutoff).update(
+            status='pending', locked_at=None
+        )
+        if released:
+            self.stdout.write(self.style.WARNING(f'Released {released} stale claim(s)'))
+
+    def claim_batch(self, batch_size):
+        """Claim up to batch_size due emails. Each claim is a conditional UPDATE,
+        so two workers never send the same row (works on SQLite too, which has
+        no SELECT ... FOR UPDATE SKIP LOCKED)."""
+        now = timezone.now()
+        candidate_ids = list(
+            OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        claimed = [
+            pk for pk in candidate_ids
+            if OutboundEmail.objects.filter(pk=pk, status='pending').update(status='sending', locked_at=now)
+        ]
+        return list(OutboundEmail.objects.filter(pk__in=claimed).order_by('next_attempt_at'))
+
+    def send_batch(self, options):
+        emails = self.claim_batch(options['batch_size'])
+        if not emails:
+            return 0, 0
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # Server unreachable: nothing was sent, retry the whole batch later.
+            self.stderr.write(self.style.ERROR(f'Could not open mail connection: {e}'))
+            for email in emails:
+                self.record_failure(email, e, options)
+            return 0, len(emails)
+
+        sent = failed = 0
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    self.record_failure(email, e, options)
+                    failed += 1
+                    continue
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.locked_at = None
+                email.last_error = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'locked_at', 'last_error', 'updated_at'])
+                sent += 1
+        finally:
+            connection.close()
+        return sent, failed
+
+    def record_failure(self, email, error, options):
+        email.attempts += 1
+        email.last_error = str(error)[:2000]
+        email.locked_at = None
+        if email.attempts >= options['max_attempts']:
+            email.status = 'failed'
+            self.stderr.write(self.style.ERROR(f'Giving up on email {email.pk} ({email.subject}): {error}'))
+        else:
+            email.status = 'pending'
+            delay = min(options['backoff'] * 2 ** (email.attempts - 1), 6 * 60 * 60)
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        email.save(update_fields=['status', 'attempts', 'last_error', 'locked_at', 'next_attempt_at', 'updated_at'])
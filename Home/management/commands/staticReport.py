@@ -0,0 +1,74 @@
+# Home/management/commands/staticReport.py
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Report bytes saved per collected static asset by its .gz and .br variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-size',
+            type=int,
+            default=0,
+            help='Only list assets of at least this many bytes',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=0,
+            help='Only list the N assets with the most bytes saved (0 = all)',
+        )
+
+    def handle(self, *args, **options):
+        root = settings.STATIC_ROOT
+        manifest_path = os.path.join(root, 'staticfiles.json')
+        if not os.path.exists(manifest_path):
+            raise CommandError(f'{manifest_path} not found - run collectstatic first')
+        with open(manifest_path) as f:
+            paths = json.load(f)['paths']
+
+        # Only the hashed names are served with long-lived caching; report those.
+        rows = []
+        for hashed in sorted(set(paths.values())):
+            path = os.path.join(root, hashed)
+            if not os.path.exists(path):
+                continue
+            size = os.path.getsize(path)
+            if size < options['min_size']:
+                continue
+            gz = self._size(path + '.gz')
+            br = self._size(path + '.br')
+            best = min(s for s in (size, gz, br) if s is not None)
+            rows.append((hashed, size, gz, br, size - best))
+        rows.sort(key=lambda row: row[4], reverse=True)
+
+        total = sum(row[1] for row in rows)
+        served = total - sum(row[4] for row in rows)
+        listed = rows[:options['limit']] if options['limit'] else rows
+
+        self.stdout.write(f"{'asset':<60} {'original':>10} {'gzip':>10} {'brotli':>10} {'saved':>10}")
+        for name, size, gz, br, saved in listed:
+            self.stdout.write(
+                f'{name[-60:]:<60} {size:>10} {self._fmt(gz):>10} {self._fmt(br):>10} '
+                f'{saved:>10} {self._pct(saved, size):>5}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(rows)} assets: {total} bytes on disk, {served} bytes served to a '
+            f'brotli/gzip client, {total - served} saved ({self._pct(total - served, total)})'
+        ))
+
+    @staticmethod
+    def _size(path):
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    @staticmethod
+    def _fmt(size):
+        return '-' if size is None else size
+
+    @staticmethod
+    def _pct(part, whole):
+        return f'{100 * part / whole:.0f}%' if whole else '-'
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0004_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientreview',
+            index=models.Index(fields=['-is_featured', '-display_order', '-created_at'], name='Home_client_is_feat_aa4573_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['display_order', '-completed_year', '-created_at'], name='home_portfolio_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'display_order'], name='home_portfolio_active_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['display_order', '-completed_year', '-created_at'], name='home_portfolio_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solution',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['display_order', 'title'], name='home_solution_active_idx'),
+        ),
+    ]
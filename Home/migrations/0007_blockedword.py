@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+# The list utils.censorship shipped with, so the admin starts from it.
+STARTER_WORDS = {
+    'fuck': 'fck, fuk, fvck, f*ck, f**k',
+    'shit': 'sht, sh*t, s**t',
+    'pussy': 'puss, p*ssy, p**sy',
+    'sex': 's*x, seks',
+    'ass': 'a**',
+    'bitch': 'b*tch, b**ch, bi*ch',
+    'dick': 'd*ck, d**k',
+    'cunt': 'c*nt, c**t',
+}
+
+
+def seed_words(apps, schema_editor):
+    BlockedWord = apps.get_model('Home', 'BlockedWord')
+    for word, variants in STARTER_WORDS.items():
+        BlockedWord.objects.get_or_create(word=word, defaults={'variants': variants})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockedWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=50, unique=True)),
+                ('variants', models.CharField(blank=True, help_text='Comma-separated extra spellings, e.g. fck, f*ck, f**k', max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Blocked Word',
+                'verbose_name_plural': 'Blocked Words',
+                'ordering': ['word'],
+            },
+        ),
+        migrations.RunPython(seed_words, migrations.RunPython.noop),
+    ]
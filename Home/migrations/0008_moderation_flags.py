@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0007_blockedword'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactinquiry',
+            name='flagged',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='contactinquiry',
+            name='flagged_words',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='contactinquiry',
+            name='screened_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:05
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Home', '0008_moderation_flags'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='portfolioproject',
+            options={'ordering': ['display_order', '-sort_year', '-created_at'], 'verbose_name': 'Portfolio Project', 'verbose_name_plural': 'Portfolio Projects'},
+        ),
+        migrations.RemoveIndex(
+            model_name='portfolioproject',
+            name='home_portfolio_active_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='portfolioproject',
+            name='home_portfolio_featured_idx',
+        ),
+        migrations.AddField(
+            model_name='portfolioproject',
+            name='sort_year',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('completed_year', 0), output_field=models.PositiveIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['display_order', '-sort_year', '-created_at', '-id'], name='home_portfolio_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['display_order', '-sort_year', '-created_at'], name='home_portfolio_featured_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils.html import format_html
@@ -80,11 +81,19 @@ class ClientReview(models.Model):
     is_featured = models.BooleanField("Featured Review", default=False)
     display_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Resized/re-encoded off the request path, see utils/images.py
+    responsive_image_field = 'client_picture'
+    responsive_image_widths = (96, 192, 400)
 
     class Meta:
         verbose_name = "Client Review"
         verbose_name_plural = "Client Reviews"
         ordering = ['-is_featured', '-display_order', '-created_at']
+        indexes = [
+            models.Index(fields=['-is_featured', '-display_order', '-created_at']),
+        ]
 
     def save(self, *args, **kwargs):
         # Check if picture exists and is being updated
@@ -99,32 +108,6 @@ class ClientReview(models.Model):
 
         super().save(*args, **kwargs)
 
-        if self.client_picture:
-            try:
-                img = Image.open(self.client_picture.path)
-
-                # Convert if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-
-                # Resize to profile picture size (400x400 for web)
-                profile_size = 400
-
-                # Resize maintaining aspect ratio
-                img.thumbnail((profile_size, profile_size), Image.Resampling.LANCZOS)
-
-                # Create circular mask for profile picture style (optional)
-                # Or save as square with rounded corners
-                img.save(self.client_picture.path, 'JPEG', quality=85)
-
-            except Exception as e:
-                # Log error but don't break the save
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error processing client image: {e}")
-
     def stars_display(self):
         return '★' * self.rating + '☆' * (5 - self.rating)
     stars_display.short_description = 'Rating'
@@ -190,6 +173,15 @@ class ContactInquiry(models.Model):
         related_name='contact_responses'
     )
 
+    # Moderation (utils.moderation)
+    flagged = models.BooleanField(default=False)
+    flagged_words = models.CharField(max_length=255, blank=True, editable=False)
+    screened_at = models.DateTimeField(blank=True, null=True, editable=False)
+    moderated_fields = ('subject', 'message')
+
+    # Spam scoring (utils.spam)
+    spam_fields = ('subject', 'message')
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -395,6 +387,10 @@ class Solution(models.Model):
         ordering = ['display_order', 'title']
         verbose_name = "Technology Solution"
         verbose_name_plural = "Technology Solutions"
+        indexes = [
+            models.Index(fields=['display_order', 'title'], name='home_solution_active_idx',
+                         condition=models.Q(is_active=True)),
+        ]
 
     def __str__(self):
         return self.title
@@ -800,9 +796,18 @@ class PortfolioProject(models.Model):
 
     cover_image = models.ImageField(upload_to="portfolio/", blank=True, null=True)
     cover_image_url = models.URLField(blank=True, help_text="Optional fallback image if no file is uploaded")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    responsive_image_field = "cover_image"
 
     project_url = models.URLField(blank=True, help_text="Live site / app store link")
     completed_year = models.PositiveIntegerField(blank=True, null=True)
+    # completed_year or 0, kept by the database. NULL sorts differently per
+    # backend and never compares in keyset pagination; this column does both.
+    sort_year = models.GeneratedField(
+        expression=Coalesce("completed_year", 0),
+        output_field=models.PositiveIntegerField(),
+        db_persist=True,
+    )
 
     is_featured = models.BooleanField(default=False)
     display_order = models.PositiveIntegerField(default=0)
@@ -811,9 +816,19 @@ class PortfolioProject(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["display_order", "-completed_year", "-created_at"]
+        ordering = ["display_order", "-sort_year", "-created_at"]
         verbose_name = "Portfolio Project"
         verbose_name_plural = "Portfolio Projects"
+        # Partial indexes: filter(is_active=True) compiles to a bare boolean
+        # column, which only an index with the same WHERE clause can serve.
+        indexes = [
+            models.Index(fields=["display_order", "-sort_year", "-created_at", "-id"],
+                         name="home_portfolio_active_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["category", "display_order"],
+                         name="home_portfolio_active_cat_idx", condition=models.Q(is_active=True)),
+            models.Index(fields=["display_order", "-sort_year", "-created_at"],
+                         name="home_portfolio_featured_idx", condition=models.Q(is_active=True, is_featured=True)),
+        ]
 
     def __str__(self):
         return self.title
@@ -854,4 +869,76 @@ class CourseStat(models.Model):
         verbose_name_plural = "Course Statistics"
 
     def __str__(self):
-        return f"Course Statistics ({self.last_updated.date()})"
\ No newline at end of file
+        return f"Course Statistics ({self.last_updated.date()})"
+
+class OutboundEmail(models.Model):
+    """Outbox for site email. Views queue a row instead of talking to SMTP in
+    the request; `manage.py sendQueuedEmail` drains it in batches over one
+    reused connection, retrying failures with exponential backoff."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list, help_text="List of recipient addresses")
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Email Outbox"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.recipients)} ({self.status})"
+
+    @classmethod
+    def queue(cls, subject, message, recipient_list, from_email=None):
+        """Queue an email for the background sender (same arguments as send_mail)."""
+        return cls.objects.create(
+            subject=subject,
+            body=message,
+            from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@blackcodelabs.com'),
+            recipients=list(recipient_list),
+        )
+
+
+class BlockedWord(models.Model):
+    """Word list for utils.censorship. Leetspeak (sh1t, a$$, b!tch) is
+    normalised by the matcher, so only list genuinely different spellings."""
+
+    word = models.CharField(max_length=50, unique=True)
+    variants = models.CharField(
+        max_length=255, blank=True,
+        help_text="Comma-separated extra spellings, e.g. fck, f*ck, f**k"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['word']
+        verbose_name = "Blocked Word"
+        verbose_name_plural = "Blocked Words"
+
+    def __str__(self):
+        return self.word
+
+    def variant_list(self):
+        return [v.strip().lower() for v in self.variants.split(',') if v.strip()]
@@ -0,0 +1,348 @@
+"""Rendering and caching for the public QR code generator.
+
+Codes are content-addressed: the cache key is a SHA-256 of (style, size, data),
+so the same request always maps to the same bytes and the same ETag. A small
+in-process LRU sits in front of a size- and age-bounded on-disk store shared by
+every worker, which means repeat codes never touch Pillow.
+
+Three output formats are served: "png" (raster), "svg" (vector) and "svgz"
+(the same SVG, gzip-compressed, sent with Content-Encoding: gzip).
+"""
+import gzip
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the look of the generated code changes so old cache entries
+# (and browser copies keyed on the old ETag) are not served for new requests.
+QR_STYLE = "rounded-red-v1"
+QR_SVG_STYLE = "path-red-v1"
+
+BRAND_FRONT_COLOR = (192, 57, 43)
+BRAND_BACK_COLOR = (255, 255, 255)
+
+
+def qr_cache_key(data, size, style=QR_STYLE):
+    """Stable hex digest identifying one rendered code."""
+    digest = hashlib.sha256()
+    for part in (style, str(size), data):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def render_qr_png(data, size):
+    """Render `data` as a branded, rounded PNG QR code and return the bytes."""
+    from utils.qrstyle import make_qr, render_styled_qr
+
+    try:
+        img = render_styled_qr(data, box_size=size, front_color=BRAND_FRONT_COLOR, back_color=BRAND_BACK_COLOR)
+    except Exception:
+        # Fallback to a plain black/white code if the styled renderer isn't available
+        img = make_qr(data, box_size=size).make_image(fill_color="#c0392b", back_color="white")
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_qr_svg(data, size):
+    """Render `data` as a branded vector QR code and return the SVG bytes."""
+    from utils.qrstyle import render_styled_svg
+
+    return render_styled_svg(data, box_size=size, front_color=BRAND_FRONT_COLOR, back_color=BRAND_BACK_COLOR)
+
+
+def render_qr_svgz(data, size):
+    """Gzip-compressed render_qr_svg. mtime=0 keeps the bytes (and ETag) stable."""
+    return gzip.compress(render_qr_svg(data, size), compresslevel=9, mtime=0)
+
+
+# format -> (style used in the cache key, Content-Type, renderer)
+QR_FORMATS = {
+    "png": (QR_STYLE, "image/png", render_qr_png),
+    "svg": (QR_SVG_STYLE, "image/svg+xml", render_qr_svg),
+    "svgz": (f"{QR_SVG_STYLE}+gzip", "image/svg+xml", render_qr_svgz),
+}
+
+
+class QRRenderCache:
+    """Bounded in-memory LRU backed by a directory of `<key>.<format>` files.
+
+    The memory tier is per process; the disk tier is shared, so a code rendered
+    by one worker is served from disk by the others. Disk writes go through a
+    temp file + rename so a concurrent reader never sees a half-written PNG.
+
+    The directory holds whatever anonymous visitors asked for, so it is bounded
+    too: prune() drops files not read for `max_age` seconds, then the least
+    recently read ones until it fits in `max_bytes`. A disk hit refreshes the
+    file's mtime, and set() prunes after every `max_bytes / 10` bytes this
+    process writes (`manage.py pruneQRCache` does it on demand).
+    """
+
+    def __init__(self, max_entries=256, directory=None, max_bytes=None, max_age=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._written = 0
+
+    def _path(self, key, fmt):
+        return os.path.join(self.directory, key[:2], f"{key}.{fmt}")
+
+    def get(self, key, fmt="png"):
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                return content
+
+        if not self.directory:
+            return None
+        path = self._path(key, fmt)
+        try:
+            with open(path, "rb") as fh:
+                content = fh.read()
+            os.utime(path)  # recently used, see prune()
+        except OSError:
+            return None
+        self._remember(key, content)
+        return content
+
+    def set(self, key, content, fmt="png"):
+        self._remember(key, content)
+        if not self.directory:
+            return
+        path = self._path(key, fmt)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write QR cache file {path}: {e}")
+            return
+        with self._lock:
+            self._written += len(content)
+            due = bool(self.max_bytes) and self._written >= self.max_bytes // 10
+            if due:
+                self._written = 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Bring the directory within max_age and max_bytes. Returns
+        (files removed, bytes left)."""
+        if not self.directory:
+            return 0, 0
+        now = time.time()
+        files = []
+        try:
+            with os.scandir(self.directory) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as entries:
+                        for entry in entries:
+                            try:
+                                stat = entry.stat()
+                            except OSError:
+                                continue
+                            # Skip temp files another process may still be writing.
+                            if entry.name.endswith(".tmp") and stat.st_mtime > now - 60:
+                                continue
+                            files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logger.warning(f"Could not scan QR cache directory {self.directory}: {e}")
+            return 0, 0
+
+        files.sort()  # least recently used first
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            stale = path.endswith(".tmp") or (self.max_age and mtime < now - self.max_age)
+            if not stale and not (self.max_bytes and total > self.max_bytes):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed, total
+
+    def _remember(self, key, content):
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_render(self, data, size, fmt="png"):
+        """Return `(key, content)`, rendering only on a miss in both tiers."""
+        style, _, render = QR_FORMATS[fmt]
+        key = qr_cache_key(data, size, style)
+        content = self.get(key, fmt)
+        if content is None:
+            content = render(data, size)
+            self.set(key, content, fmt)
+        return key, content
+
+
+qr_cache = QRRenderCache(
+    max_entries=getattr(settings, "QR_CACHE_MAX_ENTRIES", 256),
+    directory=getattr(settings, "QR_CACHE_DIR", None),
+    max_bytes=getattr(settings, "QR_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+    max_age=getattr(settings, "QR_CACHE_MAX_FILE_AGE", 60 * 60 * 24 * 30),
+)
+
+
+# ---------------------------------------------------------------------------
+# BATCH RENDERING
+# ---------------------------------------------------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Lazily start the shared process pool used for batch renders.
+
+    Uses the "spawn" start method so a worker is never forked from a threaded
+    WSGI/ASGI process holding locks. Returns None when batch workers are
+    disabled (QR_BATCH_WORKERS = 0), in which case renders happen inline."""
+    global _pool
+    workers = getattr(settings, "QR_BATCH_WORKERS", None)
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def iter_rendered(items):
+    """Yield `(item, png_bytes)` for `items` of `(name, data, size)` as each
+    render finishes (not in input order). Cached codes are yielded first;
+    misses are fanned out over the process pool and written back to the cache.
+    Items with the same data and size are rendered once. A render that fails
+    yields `(item, None)`."""
+    pending = OrderedDict()  # cache key -> items waiting for that render
+    for item in items:
+        _, data, size = item
+        key = qr_cache_key(data, size)
+        if key in pending:
+            pending[key].append(item)
+            continue
+        content = qr_cache.get(key)
+        if content is not None:
+            yield item, content
+        else:
+            pending[key] = [item]
+
+    pool = get_render_pool() if len(pending) > 1 else None
+    if pool is None:
+        for key, waiting in pending.items():
+            content = _render_and_store(key, waiting[0])
+            for item in waiting:
+                yield item, content
+        return
+
+    futures = {}
+    for key, waiting in pending.items():
+        _, data, size = waiting[0]
+        futures[pool.submit(render_qr_png, data, size)] = key
+    try:
+        for future in as_completed(futures):
+            # Forget the future once its PNG is handed out, so a large batch
+            # does not hold every rendered code in memory until the end.
+            key = futures.pop(future)
+            waiting = pending.pop(key)
+            try:
+                content = future.result()
+            except Exception as e:
+                logger.error(f"Batch QR render failed for {waiting[0][0]}: {e}")
+                content = None
+            else:
+                qr_cache.set(key, content)
+            del future
+            for item in waiting:
+                yield item, content
+    finally:
+        # The client may disconnect mid-download; don't keep rendering for it.
+        for future in futures:
+            future.cancel()
+
+
+def _render_and_store(key, item):
+    _, data, size = item
+    try:
+        content = render_qr_png(data, size)
+    except Exception as e:
+        logger.error(f"Batch QR render failed for {item[0]}: {e}")
+        return None
+    qr_cache.set(key, content)
+    return content
+
+
+class _ZipStream:
+    """Write-only file object that hands back whatever zipfile wrote since the
+    last drain. zipfile detects that it can't seek and falls back to data
+    descriptors, so entries can be sent as soon as they are written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(items):
+    """Render `items` of `(name, data, size)` and yield a ZIP archive of
+    `<name>.png` files chunk by chunk as each code finishes. Failed codes are
+    listed in an `errors.txt` entry at the end of the archive."""
+    stream = _ZipStream()
+    failed = []
+    # PNGs are already deflate-compressed; storing them avoids burning CPU for ~0 gain.
+    with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for (name, data, size), content in iter_rendered(items):
+            if content is None:
+                failed.append(f"{name}\t{data}")
+                continue
+            archive.writestr(f"{name}.png", content)
+            yield stream.drain()
+        if failed:
+            archive.writestr("errors.txt", "\n".join(failed) + "\n")
+    yield stream.drain()
@@ -0,0 +1,36 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from utils import censorship, images, pagecache
+from utils.singleflight import invalidate
+
+from .models import BlockedWord, ClientReview, DataCounter, TechServices
+
+
+@receiver([post_save, post_delete], sender=TechServices)
+@receiver([post_save, post_delete], sender=DataCounter)
+@receiver([post_save, post_delete], sender=ClientReview)
+def invalidate_homepage_context(sender, **kwargs):
+    """Homepage services, counters and reviews changed - rebuild on next hit."""
+    from .views import HOMEPAGE_CONTEXT_CACHE_KEY
+    invalidate(HOMEPAGE_CONTEXT_CACHE_KEY)
+
+
+@receiver([post_save, post_delete], sender=BlockedWord)
+def invalidate_censorship_words(sender, **kwargs):
+    censorship.invalidate()
+
+
+def schedule_image_variants(sender, instance, raw=False, **kwargs):
+    """A new or replaced upload gets its responsive derivatives built in the background."""
+    if not raw and images.needs_variants(instance):
+        images.schedule(instance)
+
+
+for model in images.responsive_models():
+    post_save.connect(schedule_image_variants, sender=model, dispatch_uid=f"image_variants:{model._meta.label}")
+
+# Any model change purges the full-page cache entries that read the model.
+post_save.connect(pagecache.purge_model, dispatch_uid="pagecache:post_save")
+post_delete.connect(pagecache.purge_model, dispatch_uid="pagecache:post_delete")
+m2m_changed.connect(pagecache.purge_model, dispatch_uid="pagecache:m2m_changed")
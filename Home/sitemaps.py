@@ -23,6 +23,7 @@ class StaticViewSitemap(Sitemap):
 class SolutionSitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.6
+    lastmod_field = "updated_at"  # utils.sitemaps regenerates when it moves
 
     def items(self):
         return Solution.objects.filter(is_active=True)
@@ -31,12 +32,13 @@ class SolutionSitemap(Sitemap):
         return reverse("solution_detail", kwargs={"slug": obj.slug})
 
     def lastmod(self, obj):
-        return getattr(obj, "updated_at", None)
+        return obj.updated_at
 
 
 class PortfolioSitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.6
+    lastmod_field = "updated_at"
 
     def items(self):
         return PortfolioProject.objects.filter(is_active=True)
@@ -51,6 +53,7 @@ class PortfolioSitemap(Sitemap):
 class BlogSitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.8
+    lastmod_field = "published_at"
 
     def items(self):
         try:
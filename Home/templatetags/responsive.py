@@ -0,0 +1,56 @@
+"""
+{% picture %} renders an uploaded image with the derivatives recorded by
+utils.images: a <picture> with AVIF and WebP <source>s and a JPEG <img>,
+each with a width-descriptor srcset, so the browser downloads the smallest
+file that fills the slot. Reads only the row's image_variants field - no
+queries, no image work.
+
+    {% load responsive %}
+    {% picture post.image src=post.cover alt=post.title sizes="(max-width: 768px) 100vw, 33vw" loading="lazy" %}
+
+`src` is the URL used when there are no derivatives yet (or no upload at
+all); it defaults to the upload's own URL. Other keyword arguments become
+attributes of the <img>.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from utils.images import FORMATS, VARIANTS_FIELD
+
+register = template.Library()
+
+
+def _record(file):
+    if not file or not getattr(file, "instance", None):
+        return None
+    record = getattr(file.instance, VARIANTS_FIELD, None)
+    if not record or record.get("source") != file.name or not record.get("variants", {}).get("jpeg"):
+        return None
+    return record
+
+
+def _srcset(entries):
+    return ", ".join(f"{default_storage.url(name)} {width}w" for width, name in entries)
+
+
+def _attrs(attrs):
+    return format_html_join("", ' {}="{}"', ((k.replace("_", "-"), v) for k, v in attrs.items() if v is not None))
+
+
+@register.simple_tag
+def picture(file, src=None, sizes="100vw", **attrs):
+    record = _record(file)
+    if record is None:
+        return format_html('<img src="{}"{}>', src or (file.url if file else ""), _attrs(attrs))
+
+    variants = record["variants"]
+    sources = format_html_join(
+        "", '<source type="{}" srcset="{}" sizes="{}">',
+        ((FORMATS[fmt][1], _srcset(entries), sizes) for fmt, entries in variants.items() if fmt != "jpeg"),
+    )
+    jpeg = variants["jpeg"]
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        sources, default_storage.url(jpeg[-1][1]), _srcset(jpeg), sizes, _attrs(attrs),
+    )
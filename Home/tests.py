@@ -0,0 +1,811 @@
+import gzip
+import json
+import re
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import timedelta
+
+from django.contrib import messages
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.middleware.csrf import get_token
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock, skipUnless
+
+from Affiliate.models import AffiliateApplication
+from Blogs.models import Post
+from utils import http, media, pagecache, ratelimit, singleflight, spam, timing
+from utils.keyset import _after, _parse_ordering
+
+from . import qr
+from .management.commands.sendQueuedEmail import Command as SendQueuedEmail
+from .models import ClientReview, ContactInquiry, OutboundEmail, PortfolioProject, Solution, TechServices
+from .views import HOMEPAGE_CONTEXT_CACHE_KEY, PortfolioPageView
+
+
+@skipUnless(connection.vendor == "sqlite", "plans are asserted in SQLite's EXPLAIN QUERY PLAN format")
+class HomeIndexUsageTests(TestCase):
+    """The portfolio, solutions and reviews queries must be answered from an index."""
+
+    def assertUsesIndex(self, queryset, table):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf"(SEARCH|SCAN) {table} USING (COVERING )?INDEX", plan)
+        self.assertNotRegex(plan, rf"SCAN {table}\s*$", plan)
+
+    def test_active_portfolio(self):
+        qs = PortfolioProject.objects.filter(is_active=True)
+        self.assertUsesIndex(qs, "Home_portfolioproject")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+    def test_portfolio_cursor_page(self):
+        qs = PortfolioProject.objects.filter(is_active=True).order_by(*PortfolioPageView.cursor_ordering)
+        after = qs.filter(_after(_parse_ordering(PortfolioPageView.cursor_ordering), [0, 2024, timezone.now(), 5], True))
+        for page in (qs[:10], after[:10]):
+            self.assertUsesIndex(page, "Home_portfolioproject")
+            self.assertNotIn("TEMP B-TREE", page.explain())
+
+    def test_portfolio_by_category(self):
+        qs = PortfolioProject.objects.filter(is_active=True, category="web")
+        self.assertUsesIndex(qs, "Home_portfolioproject")
+
+    def test_featured_portfolio(self):
+        qs = PortfolioProject.objects.filter(is_active=True, is_featured=True)[:3]
+        self.assertUsesIndex(qs, "Home_portfolioproject")
+
+    def test_active_solutions(self):
+        qs = Solution.objects.filter(is_active=True).order_by("display_order", "title")
+        self.assertUsesIndex(qs, "Home_solution")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+    def test_client_reviews_in_display_order(self):
+        qs = ClientReview.objects.all()[:6]
+        self.assertUsesIndex(qs, "Home_clientreview")
+        self.assertNotIn("TEMP B-TREE", qs.explain())
+
+
+@override_settings(SPAM_THRESHOLD=1, SPAM_MAX_LINKS=3, SPAM_MIN_WORDS=20, SPAM_RATE_LIMIT=3)
+class SpamCheckTests(SimpleTestCase):
+    """utils.spam checks, each on its own."""
+
+    def setUp(self):
+        for window in ("_bodies", "_ips"):
+            patcher = mock.patch.object(spam, window, spam._Window())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def submission(self, text="", email="jane@example.com", ip=None):
+        return spam.Submission("test", text, email, ip)
+
+    def test_link_density(self):
+        self.assertEqual(spam.link_density(self.submission("No links in this one at all.")), 0)
+        # One link in a short question is suspicious, not spam.
+        self.assertEqual(spam.link_density(self.submission("Quote for https://mysite.com redesign?")), 0.5)
+        self.assertEqual(spam.link_density(self.submission("http://a.example www.b.example https://www.c.example")), 1)
+        self.assertEqual(spam.link_density(self.submission("Cheap https://a.example https://b.example " + "x " * 5)), 1)
+        self.assertEqual(spam.link_density(self.submission("See https://a.example https://b.example " + "x " * 60)), 0.5)
+
+    def test_duplicate_body(self):
+        body = "Hello, we would like a quote for a new website."
+        self.assertEqual(spam.duplicate_body(self.submission(body)), 0)
+        self.assertEqual(spam.duplicate_body(self.submission("  HELLO, we would like a quote\nfor a new website. ")), 1)
+        self.assertEqual(spam.duplicate_body(self.submission("Thanks!")), 0)
+        self.assertEqual(spam.duplicate_body(self.submission("Thanks!")), 0)
+
+    def test_submission_rate(self):
+        scores = [spam.submission_rate(self.submission(ip="10.0.0.1")) for _ in range(4)]
+        self.assertEqual(scores, [0, 0, 0, 1])
+        self.assertEqual(spam.submission_rate(self.submission(ip="10.0.0.2")), 0)
+        self.assertEqual(spam.submission_rate(self.submission()), 0)
+
+    def test_disposable_domain(self):
+        self.assertEqual(spam.disposable_domain(self.submission(email="x@mailinator.com")), 0.5)
+        self.assertEqual(spam.disposable_domain(self.submission(email="x@mail.guerrillamail.com")), 0.5)
+        self.assertEqual(spam.disposable_domain(self.submission(email="x@gmail.com")), 0)
+        self.assertEqual(spam.disposable_domain(self.submission(email="")), 0)
+
+
+@override_settings(SPAM_THRESHOLD=1, SPAM_MAX_LINKS=3, SPAM_MIN_WORDS=20, SPAM_RATE_LIMIT=3)
+class SpamScreenTests(SimpleTestCase):
+
+    def setUp(self):
+        for window in ("_bodies", "_ips"):
+            patcher = mock.patch.object(spam, window, spam._Window())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_genuine_affiliate_application(self):
+        application = AffiliateApplication(
+            full_name="Jane", email="jane@example.com",
+            website_or_social="https://www.youtube.com/@janecodes",
+            promotion_channels="YouTube", strategy="Review videos",
+        )
+        self.assertFalse(spam.screen(application, "10.0.0.1"))
+        self.assertEqual(application.status, "pending")
+
+    def test_genuine_inquiry_with_a_link(self):
+        inquiry = ContactInquiry(email="jane@example.com", subject="Quote", message="Quote for https://mysite.com redesign?")
+        self.assertFalse(spam.screen(inquiry, "10.0.0.1"))
+        self.assertEqual(inquiry.status, "new")
+
+    def test_spam_is_marked_and_logged_without_personal_data(self):
+        inquiry = ContactInquiry(
+            email="bot@mailinator.com", subject="Offer",
+            message="Visit http://a.example and http://b.example or www.c.example",
+        )
+        with self.assertLogs("utils.spam", "INFO") as logs:
+            self.assertTrue(spam.screen(inquiry, "203.0.113.9"))
+        self.assertEqual(inquiry.status, "spam")
+        self.assertIn("Home.ContactInquiry marked as spam: link_density, disposable_domain", logs.output[0])
+        self.assertNotIn("mailinator", logs.output[0])
+        self.assertNotIn("203.0.113.9", logs.output[0])
+
+    def test_signals_add_up(self):
+        # A single link (0.5) from a throwaway address (0.5) reaches the threshold.
+        inquiry = ContactInquiry(email="x@yopmail.com", subject="Hi", message="See https://example.com")
+        with self.assertLogs("utils.spam", "INFO"):
+            self.assertTrue(spam.screen(inquiry))
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMIT_CACHE=None, TRUSTED_PROXIES=[])
+class RateLimitTests(SimpleTestCase):
+
+    def setUp(self):
+        ratelimit._local_store.clear()
+        self.factory = RequestFactory()
+
+    def view(self, rate):
+        return ratelimit.ratelimit("test", rate=rate)(lambda request: HttpResponse("ok"))
+
+    def test_empty_bucket_gets_429_with_retry_after(self):
+        view = self.view("2/m")
+        request = self.factory.post("/", REMOTE_ADDR="10.0.0.1", HTTP_ACCEPT="application/json")
+        self.assertEqual(view(request).status_code, 200)
+        self.assertEqual(view(request).status_code, 200)
+        with self.assertLogs("utils.ratelimit", "WARNING"):
+            response = view(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")  # one token every 30s
+        self.assertEqual(json.loads(response.content)["success"], False)
+        # Another client has its own bucket.
+        self.assertEqual(view(self.factory.post("/", REMOTE_ADDR="10.0.0.2")).status_code, 200)
+
+    def test_429_page_for_browsers(self):
+        view = self.view("1/h")
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1")
+        view(request)
+        with self.assertLogs("utils.ratelimit", "WARNING"):
+            response = view(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "3600")
+
+    def test_tokens_refill(self):
+        start = 1_000_000
+        for _ in range(2):
+            self.assertTrue(ratelimit.take_token("refill", "ip", "2/m", now=start)[0])
+        self.assertEqual(ratelimit.take_token("refill", "ip", "2/m", now=start + 1), (False, 29))
+        self.assertTrue(ratelimit.take_token("refill", "ip", "2/m", now=start + 31)[0])
+        self.assertFalse(ratelimit.take_token("refill", "ip", "2/m", now=start + 32)[0])
+        # A long pause refills only up to the burst size.
+        for _ in range(2):
+            self.assertTrue(ratelimit.take_token("refill", "ip", "2/m", now=start + 3600)[0])
+        self.assertFalse(ratelimit.take_token("refill", "ip", "2/m", now=start + 3600)[0])
+
+    def test_forwarded_for_is_ignored_without_a_trusted_proxy(self):
+        view = self.view("1/h")
+        view(self.factory.get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.1.1.1"))
+        spoofed = self.factory.get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="2.2.2.2")
+        self.assertEqual(ratelimit.client_ip(spoofed), "10.0.0.1")
+        with self.assertLogs("utils.ratelimit", "WARNING"):
+            self.assertEqual(view(spoofed).status_code, 429)
+
+    @override_settings(TRUSTED_PROXIES=["10.0.0.0/8"])
+    def test_right_most_untrusted_hop_behind_a_trusted_proxy(self):
+        request = self.factory.get(
+            "/", REMOTE_ADDR="10.0.0.5", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.7, 10.0.0.9",
+        )
+        self.assertEqual(ratelimit.client_ip(request), "203.0.113.7")
+        # Not from the proxy: the header is the client's own invention.
+        request = self.factory.get("/", REMOTE_ADDR="198.51.100.1", HTTP_X_FORWARDED_FOR="6.6.6.6")
+        self.assertEqual(ratelimit.client_ip(request), "198.51.100.1")
+
+
+class SingleflightInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate_waits_for_commit(self):
+        singleflight.get_or_build("sf:test", lambda: "old")
+        with self.captureOnCommitCallbacks(execute=True):
+            singleflight.invalidate("sf:test")
+            # Still inside the transaction: a rebuild would read the old rows.
+            self.assertEqual(singleflight.get_or_build("sf:test", lambda: "rebuilt too early"), "old")
+        self.assertEqual(singleflight.get_or_build("sf:test", lambda: "new"), "new")
+
+    def test_build_overtaken_by_invalidation_is_not_stored(self):
+        def builder():
+            singleflight._invalidate(["sf:test"])  # a commit lands mid-build
+            return "outdated"
+
+        self.assertEqual(singleflight.get_or_build("sf:test", builder), "outdated")
+        self.assertEqual(singleflight.get_or_build("sf:test", lambda: "current"), "current")
+        self.assertEqual(singleflight.get_or_build("sf:test", lambda: "not rebuilt"), "current")
+
+    def test_homepage_context_invalidated_on_commit(self):
+        cache.set(HOMEPAGE_CONTEXT_CACHE_KEY, {"services": []})
+        with self.captureOnCommitCallbacks(execute=True):
+            TechServices.objects.create(icon="<i></i>", name="APIs", description="REST and GraphQL")
+            self.assertIsNotNone(cache.get(HOMEPAGE_CONTEXT_CACHE_KEY))
+        self.assertIsNone(cache.get(HOMEPAGE_CONTEXT_CACHE_KEY))
+
+
+class SendQueuedEmailTests(TestCase):
+    options = {'batch_size': 50, 'max_attempts': 3, 'backoff': 60}
+
+    def queue(self, **kwargs):
+        email = OutboundEmail.queue("Hello", "Body", ["to@example.com"], "from@example.com")
+        if kwargs:
+            OutboundEmail.objects.filter(pk=email.pk).update(**kwargs)
+        return email
+
+    def send(self):
+        return SendQueuedEmail(stdout=StringIO(), stderr=StringIO()).send_batch(self.options)
+
+    def test_claim_skips_rows_not_due_or_taken(self):
+        due = self.queue()
+        self.queue(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.queue(status='sending', locked_at=timezone.now())
+
+        self.assertEqual([e.pk for e in SendQueuedEmail().claim_batch(10)], [due.pk])
+        self.assertEqual(SendQueuedEmail().claim_batch(10), [])  # already claimed
+
+    def test_send_marks_sent(self):
+        email = self.queue()
+        self.assertEqual(self.send(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+        self.assertEqual(len(mail.outbox), 1)
+
+    @mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError("refused"))
+    def test_failures_back_off_then_give_up(self, send_messages):
+        email = self.queue()
+        for attempt, delay in ((1, 60), (2, 120)):
+            self.assertEqual(self.send(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('pending', attempt, 'refused'))
+            self.assertAlmostEqual(
+                (email.next_attempt_at - timezone.now()).total_seconds(), delay, delta=5
+            )
+            self.assertEqual(self.send(), (0, 0))  # not due yet
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+
+        self.assertEqual(self.send(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 3))
+
+    def test_loop_releases_stale_claims_every_pass(self):
+        stale = self.queue(next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        passes = iter([True, False])
+
+        def sleep(seconds):
+            if not next(passes):
+                raise KeyboardInterrupt
+            # Claimed by another worker that crashed after this loop started.
+            OutboundEmail.objects.filter(pk=stale.pk).update(
+                status='sending', locked_at=timezone.now() - timedelta(hours=1)
+            )
+
+        with mock.patch('Home.management.commands.sendQueuedEmail.time.sleep', side_effect=sleep):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('sendQueuedEmail', loop=True, interval=0, stdout=StringIO())
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_at), ('pending', None))
+
+
+class QRBatchTests(TestCase):
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(qr, "qr_cache", qr.QRRenderCache()),  # memory only
+            mock.patch.object(qr, "render_qr_png", side_effect=lambda data, size: f"{data}@{size}".encode()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.render = qr.render_qr_png
+
+    items = [("a", "https://a.example", 10), ("b", "https://b.example", 10), ("a-copy", "https://a.example", 10)]
+
+    def test_identical_codes_render_once_inline(self):
+        with mock.patch.object(qr, "get_render_pool", return_value=None):
+            rendered = dict((name, content) for (name, _, _), content in qr.iter_rendered(self.items))
+        self.assertEqual(rendered["a"], rendered["a-copy"])
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_identical_codes_render_once_in_pool(self):
+        with ThreadPoolExecutor(2) as pool, mock.patch.object(qr, "get_render_pool", return_value=pool):
+            rendered = dict((name, content) for (name, _, _), content in qr.iter_rendered(self.items))
+        self.assertEqual(sorted(rendered), ["a", "a-copy", "b"])
+        self.assertEqual(rendered["a"], b"https://a.example@10")
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_batch_requires_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse("qr_code_batch"), json.dumps(["x"]), content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+
+
+class PortfolioCursorTests(TestCase):
+
+    def test_pages_follow_year_order_with_missing_years_last(self):
+        PortfolioProject.objects.all().delete()  # seeded by migration 0003
+        for i, year in enumerate([2021, None, 2024, 2019, None, 2023] * 3):
+            PortfolioProject.objects.create(title=f"Project {i}", summary="s", completed_year=year)
+        expected = list(PortfolioProject.objects.filter(is_active=True).order_by(*PortfolioPageView.cursor_ordering))
+
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = self.client.get(reverse("portfolio"), {"cursor": cursor}).context["page_obj"]
+            seen.extend(page)
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual([p.completed_year for p in seen[-6:]], [None] * 6)
+
+
+class QRImageEncodingTests(TestCase):
+
+    def test_accepts_gzip(self):
+        for header, expected in [
+            ("gzip, deflate, br", True),
+            ("br;q=1.0, GZIP;q=0.5", True),
+            ("*", True),
+            ("gzip;q=0", False),
+            ("gzip;q=0.000, *", False),
+            ("identity", False),
+            ("", False),
+        ]:
+            with self.subTest(header=header):
+                request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(http.accepts_gzip(request), expected)
+
+    @mock.patch.object(qr.qr_cache, "get_or_render", side_effect=lambda data, size, fmt: ("key", fmt.encode()))
+    def test_svg_refused_gzip_is_sent_plain(self, get_or_render):
+        url = reverse("qr_code_image")
+        plain = self.client.get(url, {"data": "x", "format": "svg"}, HTTP_ACCEPT_ENCODING="gzip;q=0, br")
+        self.assertEqual((plain.content, plain.get("Content-Encoding")), (b"svg", None))
+        gzipped = self.client.get(url, {"data": "x", "format": "svg"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual((gzipped.content, gzipped["Content-Encoding"]), (b"svgz", "gzip"))
+
+
+class HomePageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_save_purges_page_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            review = ClientReview.objects.create(
+                client_name="Ada", client_position="CTO", client_picture="client_pictures/ada.png",
+                review_text="Old words",
+            )
+        self.assertEqual(self.client.get("/")["X-Page-Cache"], "miss")
+        self.assertContains(self.client.get("/"), "Old words")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.review_text = "New words"
+            review.save()
+            # Before commit: the homepage fragment is still the old one and the
+            # page must not be stored under the post-save tag versions.
+            self.assertContains(self.client.get("/"), "Old words")
+
+        response = self.client.get("/")
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "New words")
+        self.assertEqual(self.client.get("/")["X-Page-Cache"], "hit")
+
+
+class PageCacheMiddlewareTests(TestCase):
+    """utils.pagecache driven directly, with a stand-in view on the /pricing/ URL."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.renders = 0
+        self.view = self.render_solutions
+        self.middleware = pagecache.PageCacheMiddleware(lambda request: self.view(request))
+
+    def render_solutions(self, request):
+        self.renders += 1
+        titles = ",".join(Solution.objects.values_list("title", flat=True))
+        return HttpResponse(f"render {self.renders}: {titles}")
+
+    def get(self, path="/pricing/", session=None, **extra):
+        request = self.factory.get(path, **extra)
+        request.session = SessionStore()
+        request.session.update(session or {})
+        request._messages = FallbackStorage(request)
+        return request, self.middleware(request)
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "miss")
+        response = self.get()[1]
+        self.assertEqual((response["X-Page-Cache"], response.content), ("hit", b"render 1: "))
+
+    def test_save_and_delete_purge_readers(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            solution = Solution.objects.create(slug="apis", title="APIs", short_description="s", detailed_description="d")
+            self.assertEqual(self.get()[1]["X-Page-Cache"], "hit")  # not committed yet
+        self.assertEqual(self.get()[1].content, b"render 2: APIs")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            solution.delete()
+        self.assertEqual(self.get()[1].content, b"render 3: ")
+
+    def test_m2m_change_purges_readers(self):
+        author = User.objects.create_user("author")
+        post = Post.objects.create(title="Hi", author=author, excerpt="e", body="b")
+        self.view = lambda request: HttpResponse(str(list(post.likes.values_list("pk", flat=True))))
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.likes.add(author)
+        self.assertEqual(self.get()[1].content, str([author.pk]).encode())
+
+    def test_unrelated_save_keeps_page(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            TechServices.objects.create(icon="<i></i>", name="APIs", description="d")
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "hit")
+
+    def test_stale_page_served_while_another_request_renders(self):
+        request, _ = self.get()
+        key = self.middleware._key(request)
+        pagecache.purge("Home.Solution")
+        cache.add(f"{key}:lock", 1)
+        response = self.get()[1]
+        self.assertEqual((response["X-Page-Cache"], response.content, self.renders), ("stale", b"render 1: ", 1))
+
+        cache.delete(f"{key}:lock")
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "miss")
+        self.assertFalse(cache.get(f"{key}:lock"))
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "hit")
+
+    def test_save_during_rerender_leaves_page_stale(self):
+        self.get()
+        pagecache.purge("Home.Solution")
+
+        def render_then_save(request):
+            response = self.render_solutions(request)
+            pagecache.purge("Home.Solution")  # a commit lands mid-render
+            return response
+
+        self.view = render_then_save
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "miss")
+        self.view = self.render_solutions
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "miss")
+        self.assertEqual(self.get()[1]["X-Page-Cache"], "hit")
+
+    def test_allowed_query_params_are_cached(self):
+        self.get("/pricing/?page=2&category=web")
+        self.assertEqual(self.get("/pricing/?category=web&page=2")[1]["X-Page-Cache"], "hit")
+        self.assertEqual(self.get("/pricing/?page=3")[1]["X-Page-Cache"], "miss")
+
+    def assertBypassed(self, **kwargs):
+        for _ in range(2):
+            response = self.get(**kwargs)[1]
+            self.assertNotIn("X-Page-Cache", response)
+        self.assertEqual(self.renders, 2)
+
+    def test_other_query_params_bypass(self):
+        self.assertBypassed(path="/pricing/?q=django")
+
+    def test_signed_in_session_bypasses(self):
+        self.assertBypassed(session={SESSION_KEY: "1"})
+
+    def test_views_not_listed_bypass(self):
+        self.assertBypassed(path="/contact/")
+
+    def test_pending_messages_bypass(self):
+        def with_message(request):
+            messages.info(request, "Saved")
+            return self.render_solutions(request)
+
+        self.view = with_message
+        for _ in range(2):
+            self.assertEqual(self.get()[1]["X-Page-Cache"], "miss")
+
+    def assertNotStored(self, view):
+        self.view = view
+        for _ in range(2):
+            self.assertEqual(self.get()[1]["X-Page-Cache"], "miss")
+        self.assertEqual(self.renders, 2)
+
+    def test_csrf_token_responses_not_stored(self):
+        def with_token(request):
+            get_token(request)
+            return self.render_solutions(request)
+
+        self.assertNotStored(with_token)
+
+    def test_cookie_responses_not_stored(self):
+        def with_cookie(request):
+            response = self.render_solutions(request)
+            response.set_cookie("seen", "1")
+            return response
+
+        self.assertNotStored(with_cookie)
+
+    def test_private_and_no_store_responses_not_stored(self):
+        for cache_control in ("private", "no-store"):
+            with self.subTest(cache_control=cache_control):
+                cache.clear()
+                self.renders = 0
+
+                def uncacheable(request):
+                    response = self.render_solutions(request)
+                    response["Cache-Control"] = cache_control
+                    return response
+
+                self.assertNotStored(uncacheable)
+
+
+class QRRenderCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+
+    def store(self, cache, name, size, age=0):
+        cache.set(name * 4, b"x" * size)
+        path = cache._path(name * 4, "png")
+        then = time.time() - age
+        os.utime(path, (then, then))
+        return path
+
+    def test_prune_drops_files_unread_for_max_age(self):
+        cache = qr.QRRenderCache(directory=self.directory, max_age=3600)
+        old = self.store(cache, "a", 10, age=7200)
+        recent = self.store(cache, "b", 10, age=60)
+        self.assertEqual(cache.prune(), (1, 10))
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(recent))
+
+    def test_prune_evicts_least_recently_read_over_max_bytes(self):
+        cache = qr.QRRenderCache(directory=self.directory)
+        paths = [self.store(cache, name, 10, age=age) for name, age in (("a", 30), ("b", 20), ("c", 10))]
+        cache.max_bytes = 25
+        cache.clear()
+        cache.get("aaaa")  # a disk hit makes "a" the most recently used
+        self.assertEqual(cache.prune(), (1, 20))
+        self.assertEqual([os.path.exists(p) for p in paths], [True, False, True])
+
+    def test_set_prunes_as_it_writes(self):
+        cache = qr.QRRenderCache(directory=self.directory, max_bytes=100)
+        for i in range(30):
+            cache.set(f"{i:04d}", b"x" * 10)
+        stored = sum(len(files) for _, _, files in os.walk(self.directory))
+        self.assertLessEqual(stored * 10, 100)
+
+
+@mock.patch.object(qr.qr_cache, "get_or_render", side_effect=lambda data, size, fmt: ("key", b"png"))
+class QRImageCachingTests(TestCase):
+
+    def get(self, **extra):
+        return self.client.get(reverse("qr_code_image"), {"data": "https://example.com", "size": 8}, **extra)
+
+    def test_etag_and_cache_control(self, get_or_render):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{qr.qr_cache_key("https://example.com", 8)}"')
+        self.assertEqual(response["Cache-Control"], "public, max-age=86400")
+
+    def test_matching_etag_is_not_modified_without_rendering(self, get_or_render):
+        etag = self.get()["ETag"]
+        get_or_render.reset_mock()
+        for header in (etag, f'"other", {etag}', "*"):
+            with self.subTest(if_none_match=header):
+                response = self.get(HTTP_IF_NONE_MATCH=header)
+                self.assertEqual((response.status_code, response.content), (304, b""))
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(response["Cache-Control"], "public, max-age=86400")
+        get_or_render.assert_not_called()
+
+    def test_other_etag_renders(self, get_or_render):
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+
+class SitemapTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("django.contrib.sitemaps.views.sitemap", kwargs={"section": "portfolio"})
+
+    def test_index_lists_sections(self):
+        response = self.client.get(reverse("sitemap_index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.url)
+
+    def test_section_regenerates_when_items_change(self):
+        first = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)["ETag"], first["ETag"])
+
+        project = PortfolioProject.objects.create(title="Fresh Launch", summary="s")
+        second = self.client.get(self.url)
+        self.assertContains(second, project.get_absolute_url())
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+        project.is_active = False
+        project.save()
+        self.assertNotContains(self.client.get(self.url), project.get_absolute_url())
+
+    def test_conditional_get_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='W/"other"').status_code, 200)
+
+    def test_gzip_negotiation(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        gzipped = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br, gzip")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gzipped.content), plain.content)
+
+        for refused in ("gzip;q=0", "gzip;q=0, br", "identity"):
+            with self.subTest(accept_encoding=refused):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=refused)
+                self.assertNotIn("Content-Encoding", response)
+                self.assertEqual(response.content, plain.content)
+
+
+class MediaServingTests(SimpleTestCase):
+    data = bytes(range(256)) * 40  # 10240 bytes
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        os.makedirs(os.path.join(tmp.name, "about_videos"))
+        with open(os.path.join(tmp.name, "about_videos", "v.mp4"), "wb") as fh:
+            fh.write(self.data)
+        with open(os.path.join(tmp.name, ".secret"), "wb") as fh:
+            fh.write(b"x")
+        override = override_settings(MEDIA_ROOT=tmp.name, MEDIA_ACCEL="")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.url = "/media/about_videos/v.mp4"
+
+    def get(self, path=None, **headers):
+        response = self.client.get(path or self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual((response.status_code, response["Accept-Ranges"]), (200, "bytes"))
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(self.body(response), self.data)
+
+    def test_ranges(self):
+        size = len(self.data)
+        for header, (start, end) in [
+            ("bytes=100-199", (100, 199)),
+            ("bytes=-10", (size - 10, size - 1)),
+            ("bytes=10000-", (10000, size - 1)),
+            ("bytes=10200-99999", (10200, size - 1)),
+        ]:
+            with self.subTest(range=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/{size}")
+                self.assertEqual(response["Content-Length"], str(end - start + 1))
+                self.assertEqual(self.body(response), self.data[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        for header in ("bytes=20000-", "bytes=-0", "bytes=50-10"):
+            with self.subTest(range=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual((response.status_code, response["Content-Range"]), (416, f"bytes */{len(self.data)}"))
+
+    def test_multi_range_gets_whole_file(self):
+        self.assertEqual(self.get(HTTP_RANGE="bytes=0-1,5-9").status_code, 200)
+
+    def test_if_range(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag).status_code, 206)
+        stale = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.body(stale), self.data)
+        self.assertEqual(self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE="Sat, 01 Jan 2000 00:00:00 GMT").status_code, 200)
+
+    def test_not_modified(self):
+        first = self.get()
+        for headers in ({"HTTP_IF_NONE_MATCH": first["ETag"]}, {"HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]}):
+            with self.subTest(headers=headers):
+                response = self.get(**headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], first["ETag"])
+                self.assertEqual(response.content, b"")
+
+    def test_traversal_and_hidden_files_are_not_found(self):
+        request = RequestFactory().get("/")
+        for path in ("../manage.py", "about_videos/../../manage.py", "/etc/passwd", ".secret", "about_videos"):
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    media.serve_media(request, path)
+        self.assertEqual(self.get("/media/%2e%2e/manage.py").status_code, 404)
+
+    def test_proxy_offload(self):
+        with override_settings(MEDIA_ACCEL="x-accel", MEDIA_ACCEL_PREFIX="/protected-media/"):
+            response = self.get("/media/about_videos/v.mp4")
+            self.assertEqual(response["X-Accel-Redirect"], "/protected-media/about_videos/v.mp4")
+            self.assertEqual((response.content, response["Content-Type"]), (b"", "video/mp4"))
+        with override_settings(MEDIA_ACCEL="x-sendfile"):
+            response = self.get()
+            self.assertEqual(response["X-Sendfile"], os.path.join(settings.MEDIA_ROOT, "about_videos", "v.mp4"))
+            self.assertEqual(response.content, b"")
+
+
+class RequestTimingTests(TestCase):
+    SERVER_TIMING_RE = re.compile(r'^db;dur=\d+\.\d;desc="\d+ queries", tpl;dur=\d+\.\d, total;dur=\d+\.\d$')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", "staff@example.com", "x", is_staff=True)
+        cls.member = User.objects.create_user("member", "member@example.com", "x")
+
+    def setUp(self):
+        cache.clear()
+        timing.view_timings.clear()
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_header_format(self):
+        response = self.client.get(reverse("pricing"))
+        self.assertRegex(response["Server-Timing"], self.SERVER_TIMING_RE)
+
+    def test_server_timing_only_for_staff_outside_debug(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("pricing")))
+        url = reverse("request_timing_stats")  # a view that loads request.user
+        self.client.force_login(self.member)
+        self.assertNotIn("Server-Timing", self.client.get(url))
+        self.client.force_login(self.staff)
+        self.assertRegex(self.client.get(url)["Server-Timing"], self.SERVER_TIMING_RE)
+
+    def test_stats_view_is_staff_only(self):
+        url = reverse("request_timing_stats")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.staff)
+        self.client.get(reverse("pricing"))
+        stats = json.loads(self.client.get(url).content)
+        self.assertEqual(set(stats["views"]["pricing"]), {"count", "p50", "p95", "p99", "max", "avg_queries"})
+        self.assertEqual(stats["views"]["pricing"]["count"], 1)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs("timing.slow", "WARNING") as logs:
+            self.client.get(reverse("pricing"))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry["view"], entry["status"], entry["method"]), ("pricing", 200, "GET"))
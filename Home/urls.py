@@ -18,4 +18,6 @@ urlpatterns = [
 
     path('qr-code/', views.QRGeneratorPageView.as_view(), name='qr_generator'),
     path('qr-code/image/', views.qr_code_image, name='qr_code_image'),
+    path('qr-code/batch/', views.qr_code_batch, name='qr_code_batch'),
+    path('staff/timing/', views.request_timing_stats, name='request_timing_stats'),
 ]
@@ -7,11 +7,10 @@ from .models import (
     TechServices, DataCounter,
     ClientReview, Solution,
     PricingPlan, PricingFAQ,
-    PortfolioProject,
+    PortfolioProject, OutboundEmail,
 )
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.core.serializers.json import DjangoJSONEncoder
-from django.views.decorators.csrf import csrf_exempt
 from .forms import ContactForm
 import json
 from django.views.generic.edit import FormView
@@ -26,28 +25,48 @@ from django.contrib import messages
 from django.utils import timezone
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
+from django.contrib.admin.views.decorators import staff_member_required
+from utils.keyset import CursorPaginationMixin
+from utils.ratelimit import client_ip, ratelimit
+from utils.singleflight import get_or_build
+from utils import spam
 
 logger = logging.getLogger(__name__)
 
-class HomePageView(ListView):
+HOMEPAGE_CONTEXT_CACHE_KEY = "home:page-context"
+
+
+def build_homepage_context():
+    """Everything the homepage reads from the database. Only changes when staff
+    edit services, counters or reviews, so HomePageView caches it and
+    Home.signals invalidates it on save/delete."""
+    data_counter = DataCounter.objects.filter(is_active=True).first()
+    if not data_counter:
+        # Unsaved defaults - a GET should never write to the database
+        data_counter = DataCounter(
+            projects_delivered=1247,
+            systems_automated=892,
+            happy_clients=765,
+            returning_clients=423,
+            is_active=True
+        )
+    return {
+        'tech_services': list(TechServices.objects.all()),
+        'data_counters': data_counter,
+        'client_reviews': list(ClientReview.objects.all()[:6]),
+    }
+
+
+class HomePageView(TemplateView):
     template_name = "Home/index.html"
-    model = TechServices
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['tech_services'] = TechServices.objects.all()
-        data_counter = DataCounter.objects.filter(is_active=True).first()
-        if not data_counter:
-            # Create a default counter if none exists
-            data_counter = DataCounter.objects.create(
-                projects_delivered=1247,
-                systems_automated=892,
-                happy_clients=765,
-                returning_clients=423,
-                is_active=True
-            )
-        context['data_counters'] = data_counter
-        context["client_reviews"] = ClientReview.objects.all()[:6]
+        context.update(get_or_build(
+            HOMEPAGE_CONTEXT_CACHE_KEY,
+            build_homepage_context,
+            timeout=getattr(settings, 'HOMEPAGE_CACHE_TIMEOUT', 60 * 60),
+        ))
         return context
 
 class GamesPageView(TemplateView):
@@ -63,11 +82,13 @@ class Pricing(TemplateView):
         return context
 
 
-class PortfolioPageView(ListView):
+class PortfolioPageView(CursorPaginationMixin, ListView):
     model = PortfolioProject
     template_name = "Home/portfolio.html"
     context_object_name = "projects"
     paginate_by = 9
+    # Meta.ordering plus id, all served by home_portfolio_active_idx
+    cursor_ordering = ("display_order", "-sort_year", "-created_at", "-id")
 
     def get_queryset(self):
         qs = PortfolioProject.objects.filter(is_active=True)
@@ -103,6 +124,7 @@ class PortfolioDetailView(DetailView):
 
 
 @csrf_protect
+@ratelimit("contact", methods=["POST"])
 def contact_view(request):
     """Handle contact form submissions"""
 
@@ -130,6 +152,8 @@ def contact_view(request):
                     if current_time - previous_time < 5:  # Less than 5 seconds between submissions
                         inquiry.status = 'spam'
                         inquiry.priority = 1
+                if inquiry.status != 'spam':
+                    spam.screen(inquiry, inquiry.ip_address)
 
                 # Save to database
                 inquiry.save()
@@ -137,12 +161,14 @@ def contact_view(request):
                 # Store submission time for spam detection
                 request.session['submission_time'] = timezone.now().timestamp()
 
-                # Send email notifications (optional - comment out if not configured)
-                try:
-                    send_contact_notification(inquiry)
-                    send_auto_response(inquiry)
-                except Exception as e:
-                    logger.warning(f"Email sending failed: {e}")
+                # Queue email notifications; the sendQueuedEmail command delivers them.
+                # Spam is kept for review but nobody is emailed about it.
+                if inquiry.status != 'spam':
+                    try:
+                        send_contact_notification(inquiry)
+                        send_auto_response(inquiry)
+                    except Exception as e:
+                        logger.warning(f"Email queueing failed: {e}")
 
                 # Success message
                 messages.success(
@@ -190,16 +216,11 @@ def contact_view(request):
     return render(request, 'Home/contact.html', context)
 
 def get_client_ip(request):
-    """Get the client's IP address"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    """Get the client's IP address (see utils.ratelimit.client_ip)"""
+    return client_ip(request, default=None)
 
 def send_contact_notification(inquiry):
-    """Send notification email to admin with better debugging"""
+    """Queue notification email to admin (sent by the sendQueuedEmail command)"""
 
     # Check if email is configured
     if not hasattr(settings, 'EMAIL_BACKEND'):
@@ -243,24 +264,21 @@ def send_contact_notification(inquiry):
         # Determine sender
         sender_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@blackcodelabs.com')
 
-        logger.info(f"Attempting to send notification email to: {recipient_email}")
-
-        send_mail(
+        OutboundEmail.queue(
             subject=subject,
             message=message,
             from_email=sender_email,
             recipient_list=[recipient_email],
-            fail_silently=False,  # Set to True in production
         )
 
-        logger.info(f"Notification email sent successfully to {recipient_email}")
+        logger.info(f"Notification email queued for {recipient_email}")
 
     except Exception as e:
-        logger.error(f"Failed to send contact notification email: {e}")
+        logger.error(f"Failed to queue contact notification email: {e}")
         # Don't raise the error - we don't want form submission to fail because of email
 
 def send_auto_response(inquiry):
-    """Send auto-response email to the user with better debugging"""
+    """Queue auto-response email to the user (sent by the sendQueuedEmail command)"""
     if not inquiry.email:
         logger.info("No user email provided - skipping auto-response")
         return
@@ -288,20 +306,17 @@ def send_auto_response(inquiry):
         # Determine sender
         sender_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@blackcodelabs.com')
 
-        logger.info(f"Attempting to send auto-response to user: {inquiry.email}")
-
-        send_mail(
+        OutboundEmail.queue(
             subject=subject,
             message=message,
             from_email=sender_email,
             recipient_list=[inquiry.email],
-            fail_silently=False,  # Set to True in production
         )
 
-        logger.info(f"Auto-response email sent successfully to {inquiry.email}")
+        logger.info(f"Auto-response email queued for {inquiry.email}")
 
     except Exception as e:
-        logger.error(f"Failed to send auto-response email: {e}")
+        logger.error(f"Failed to queue auto-response email: {e}")
         # Don't raise the error - we don't want form submission to fail because of email
 
 
@@ -321,7 +336,7 @@ class SolutionsPageView(ListView):
 
 class SolutionDetailView(DetailView):
     model = Solution
-    template_name = 'solutions_detail.html'
+    template_name = 'Home/solutions_detail.html'
     context_object_name = 'solution'
     slug_field = 'slug'
     slug_url_kwarg = 'slug'
@@ -334,15 +349,22 @@ class QRGeneratorPageView(TemplateView):
     template_name = "Home/qr_generator.html"
 
 
+@ratelimit("qr")
 def qr_code_image(request):
-    """Generates a PNG QR code on the fly for ?data=<text or url> and streams it back.
-    No text/url is stored — this is a stateless generator anyone can hit."""
-    import io
-    import qrcode
-    from qrcode.image.styledpil import StyledPilImage
-    from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
-    from qrcode.image.styles.colormasks import SolidFillColorMask
-    from django.http import HttpResponse
+    """Generates a QR code for ?data=<text or url> and streams it back. Anyone
+    can hit it. Nothing is saved to the database, but the rendered image is
+    kept in the QR render cache (including a bounded directory on disk, see
+    Home.qr.QRRenderCache), so data encoded here persists there until pruned.
+
+    ?format=svg returns a vector code (gzip-compressed when the client accepts
+    it) instead of the default PNG. Output is content-addressed (see Home.qr),
+    so repeat codes come straight from the render cache and revalidations are
+    answered with a 304 before any work."""
+    from django.http import HttpResponse, HttpResponseNotModified
+    from django.utils.cache import patch_vary_headers
+    from django.utils.http import parse_etags
+    from utils.http import accepts_gzip
+    from .qr import QR_FORMATS, qr_cache, qr_cache_key
 
     data = request.GET.get('data', '').strip()
     if not data:
@@ -356,37 +378,144 @@ def qr_code_image(request):
     except (TypeError, ValueError):
         size = 10
 
-    qr = qrcode.QRCode(
-        version=None,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=size,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
+    output = request.GET.get('format', 'png').lower()
+    if output not in ('png', 'svg'):
+        return HttpResponseBadRequest("Unsupported format (use png or svg)")
+    fmt = output
+    if output == 'svg' and accepts_gzip(request):
+        fmt = 'svgz'
+    style, content_type, _ = QR_FORMATS[fmt]
+
+    etag = f'"{qr_cache_key(data, size, style)}"'
+    cache_control = f"public, max-age={getattr(settings, 'QR_CACHE_MAX_AGE', 86400)}"
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+    else:
+        _, content = qr_cache.get_or_render(data, size, fmt)
+        response = HttpResponse(content, content_type=content_type)
+        if fmt == 'svgz':
+            response['Content-Encoding'] = 'gzip'
+        download = request.GET.get('download')
+        if download:
+            response['Content-Disposition'] = f'attachment; filename="qrcode.{output}"'
+
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    if output == 'svg':
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _parse_qr_batch(request):
+    """Turn a batch request into a list of `(name, data, size)` tuples.
+
+    Accepts either a CSV upload in the `file` field (columns: data[,name[,size]],
+    header row optional) or a JSON body: a list of strings, or
+    `{"size": 10, "items": ["text", {"data": "...", "name": "...", "size": 12}]}`.
+    Raises ValueError with a user-facing message on bad input."""
+    import csv
+    import io
+    from django.utils.text import slugify
+
+    default_size = 10
+    rows = []
+    upload = request.FILES.get('file')
+    if upload is not None:
+        try:
+            text = upload.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValueError("CSV must be UTF-8 encoded.")
+        reader = csv.reader(io.StringIO(text))
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            if not rows and row[0].strip().lower() == 'data':
+                continue  # header row
+            rows.append({
+                'data': row[0],
+                'name': row[1] if len(row) > 1 else '',
+                'size': row[2] if len(row) > 2 else None,
+            })
+        default_size = request.POST.get('size', default_size)
+    else:
+        try:
+            payload = json.loads(request.body or '[]')
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON body.")
+        if isinstance(payload, dict):
+            default_size = payload.get('size', default_size)
+            payload = payload.get('items', [])
+        if not isinstance(payload, list):
+            raise ValueError("Expected a list of items.")
+        for entry in payload:
+            rows.append(entry if isinstance(entry, dict) else {'data': entry})
+
+    max_items = getattr(settings, 'QR_BATCH_MAX_ITEMS', 5000)
+    if not rows:
+        raise ValueError("No items to render.")
+    if len(rows) > max_items:
+        raise ValueError(f"Too many items (max {max_items}).")
+
+    items, seen = [], set()
+    for index, row in enumerate(rows, start=1):
+        data = str(row.get('data') or '').strip()
+        if not data:
+            raise ValueError(f"Item {index} has no data.")
+        if len(data) > 2000:
+            raise ValueError(f"Item {index} is too long.")
+        try:
+            size = max(4, min(int(row.get('size') or default_size), 20))
+        except (TypeError, ValueError):
+            size = 10
+        name = slugify(str(row.get('name') or ''))[:80] or f"qr-{index:05d}"
+        if name in seen:
+            name = f"{name}-{index}"
+        seen.add(name)
+        items.append((name, data, size))
+    return items
+
+
+@require_POST
+@ratelimit("qr_batch")
+def qr_code_batch(request):
+    """Renders many QR codes at once and streams them back as a ZIP of PNGs.
+    Codes are rendered across a process pool and each one is written to the
+    archive as soon as it finishes. Unlike qr_code_image this is a POST that
+    costs real CPU, so it keeps CSRF protection: only pages served by this
+    site (which send the csrftoken) can start a batch."""
+    from django.http import StreamingHttpResponse
+    from .qr import stream_zip
 
     try:
-        img = qr.make_image(
-            image_factory=StyledPilImage,
-            module_drawer=RoundedModuleDrawer(),
-            color_mask=SolidFillColorMask(front_color=(192, 57, 43), back_color=(255, 255, 255)),
-        )
-    except Exception:
-        # Fallback to a plain black/white code if the styled renderer isn't available
-        img = qr.make_image(fill_color="#c0392b", back_color="white")
-
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-
-    response = HttpResponse(buffer.getvalue(), content_type="image/png")
-    download = request.GET.get('download')
-    if download:
-        response['Content-Disposition'] = 'attachment; filename="qrcode.png"'
+        items = _parse_qr_batch(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    logger.info(f"Batch QR request for {len(items)} codes - IP: {get_client_ip(request)}")
+    response = StreamingHttpResponse(stream_zip(items), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename="qrcodes.zip"'
     response['Cache-Control'] = 'no-store'
     return response
 
 
+# ---------------------------------------------------------------------------
+# REQUEST TIMING (utils/timing.py)
+# ---------------------------------------------------------------------------
+@staff_member_required
+def request_timing_stats(request):
+    """Per-view p50/p95/p99 (ms) for the requests this worker process has served."""
+    import os
+    from utils.timing import view_timings
+
+    return JsonResponse({
+        "pid": os.getpid(),
+        "slow_request_ms": getattr(settings, 'SLOW_REQUEST_MS', 500),
+        "views": view_timings.summary(),
+    })
+
+
 # ---------------------------------------------------------------------------
 # ROBOTS.TXT
 # ---------------------------------------------------------------------------
@@ -49,6 +49,7 @@ class ProjectRequest(models.Model):
         ('reviewed', 'Reviewed'),
         ('accepted', 'Accepted'),
         ('rejected', 'Rejected'),
+        ('spam', 'Spam'),
     ]
     
     project = models.ForeignKey(
@@ -72,6 +73,9 @@ class ProjectRequest(models.Model):
     email = models.EmailField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Spam scoring (utils.spam)
+    spam_fields = ('custom_title', 'description')
     
     def __str__(self):
         return f"{self.custom_title} - {self.email}"
@@ -2,6 +2,9 @@ from django.shortcuts import render, redirect
 from django.views.generic import ListView, CreateView
 from django.contrib import messages
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from utils import spam
+from utils.ratelimit import client_ip, ratelimit
 from .models import Project
 from .forms import ProjectRequestForm
 
@@ -18,11 +21,14 @@ class ProjectListView(ListView):
         context['form'] = ProjectRequestForm()
         return context
     
+    @method_decorator(ratelimit("project_request"))
     def post(self, request, *args, **kwargs):
         form = ProjectRequestForm(request.POST)
         
         if form.is_valid():
-            form.save()
+            project_request = form.save(commit=False)
+            spam.screen(project_request, client_ip(request))
+            project_request.save()
             messages.success(
                 request, 
                 'Your project request has been submitted successfully! We\'ll contact you within 24 hours.'
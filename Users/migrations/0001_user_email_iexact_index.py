@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:10
+
+from django.db import migrations
+
+INDEX_NAME = "auth_user_email_ci_idx"
+
+# email__iexact compiles to UPPER("email") = UPPER(%s) on Postgres and to
+# "email" LIKE %s ESCAPE '\' on SQLite; each needs its own kind of index.
+CREATE_SQL = {
+    "postgresql": f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "auth_user" (UPPER("email"))',
+    "sqlite": f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "auth_user" ("email" COLLATE NOCASE)',
+}
+
+
+def create_index(apps, schema_editor):
+    sql = CREATE_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,3 +1,13 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from unittest import skipUnless
 
-# Create your tests here.
+
+@skipUnless(connection.vendor == "sqlite", "plans are asserted in SQLite's EXPLAIN QUERY PLAN format")
+class EmailLookupIndexTests(TestCase):
+
+    def test_email_iexact_uses_index(self):
+        # RegisterForm.clean_email
+        plan = User.objects.filter(email__iexact="Someone@Example.com").explain()
+        self.assertIn("USING INDEX auth_user_email_ci_idx", plan)
@@ -1,6 +1,127 @@
-from colorama import Back, Style
+"""
+Profanity matching for user-submitted text.
+
+CensorInput(text) -> (is_appropriate, censored_text, found_words)
+
+Every word and spelling is compiled once into a single regex alternation
+(longest first), and a comment is scanned once: the text is normalised
+character-for-character (lower case, leetspeak such as 0->o, 1->i, 3->e,
+4->a, 5/$->s, @->a), so positions in the normalised copy are positions in
+the original and each match is starred in place while the output is
+assembled. Cost is linear in the comment, however many words it contains,
+and only the matched occurrences are touched.
+
+The word list is the Home.BlockedWord table (editable in the admin), or
+DEFAULT_WORDS when the table is empty or there is no database, e.g. when
+this module is run on its own:
+
+    python -m utils.censorship      # microbenchmark on 2,000-character comments
+"""
 import re
 
+from django.apps import apps
+from django.conf import settings
+
+from utils.singleton import CachedSingleton
+
+DEFAULT_WORDS = {
+    'fuck': ['fck', 'fuk', 'fvck', 'f*ck', 'f**k'],
+    'shit': ['sht', 'sh*t', 's**t'],
+    'pussy': ['puss', 'p*ssy', 'p**sy'],
+    'sex': ['s*x', 'seks'],
+    'ass': ['a**'],
+    'bitch': ['b*tch', 'b**ch', 'bi*ch'],
+    'dick': ['d*ck', 'd**k'],
+    'cunt': ['c*nt', 'c**t'],
+}
+
+# One character in, one character out, so match offsets carry over to the
+# original text. Non-ASCII characters are left alone (str.lower() can change
+# their length).
+LEET = {'0': 'o', '1': 'i', '3': 'e', '4': 'a', '@': 'a', '5': 's', '$': 's', '7': 't'}
+NORMALISE = str.maketrans({
+    **{chr(c): chr(c).lower() for c in range(ord('A'), ord('Z') + 1)},
+    **LEET,
+})
+# Stand-ins that are also ordinary punctuation ("sh!t" but "shit!") are
+# matched inside a word instead of being normalised.
+LOOKALIKES = {'i': '[i!|]', 't': '[t+]'}
+
+
+def normalise(text):
+    return text.translate(NORMALISE)
+
+
+def _spelling_pattern(spelling):
+    return ''.join(LOOKALIKES.get(ch, re.escape(ch)) for ch in normalise(spelling))
+
+
+class Matcher:
+    """A compiled word list. `words` maps each word to its extra spellings."""
+
+    def __init__(self, words):
+        self.words = words
+        spellings = {normalise(s) for word, variants in words.items() for s in [word, *variants] if s}
+        alternation = '|'.join(_spelling_pattern(s) for s in sorted(spellings, key=len, reverse=True))
+        # Whole words only; \b would not work around the * in masked spellings.
+        self.pattern = re.compile(rf'(?<![a-z0-9_])(?:{alternation})(?![a-z0-9_])') if spellings else None
+
+    def censor(self, text):
+        """(is_appropriate, censored_text, found_words) in a single pass over `text`."""
+        if self.pattern is None:
+            return True, text, []
+        pieces, found, last = [], [], 0
+        for match in self.pattern.finditer(normalise(text)):
+            start, end = match.span()
+            original = text[start:end]
+            found.append(original.lower())
+            pieces.append(text[last:start])
+            pieces.append(original[0] + '*' * (len(original) - 1))
+            last = end
+        if not found:
+            return True, text, []
+        pieces.append(text[last:])
+        return False, ''.join(pieces), found
+
+
+_default_matcher = Matcher(DEFAULT_WORDS)
+_matcher = None
+
+
+def load_words():
+    """{word: [spellings]} from Home.BlockedWord, or DEFAULT_WORDS if it has none."""
+    from django.db import DatabaseError
+
+    from Home.models import BlockedWord
+
+    try:
+        words = {w.word: w.variant_list() for w in BlockedWord.objects.filter(is_active=True)}
+    except DatabaseError:  # not migrated yet
+        return DEFAULT_WORDS
+    return words or DEFAULT_WORDS
+
+
+_word_list = CachedSingleton('censorship:words', load_words)
+
+
+def get_matcher():
+    """The matcher for the current word list, recompiled only when it changes."""
+    global _matcher
+    if not settings.configured or not apps.ready:
+        return _default_matcher
+
+    words = _word_list.get()
+    matcher = _matcher
+    if matcher is None or (matcher.words is not words and matcher.words != words):
+        matcher = _matcher = Matcher(words)
+    return matcher
+
+
+def invalidate():
+    """Reload the word list on next use (BlockedWord changed)."""
+    _word_list.invalidate()
+
+
 def CensorInput(comment):
     """
     Censor inappropriate content in user comments
@@ -9,48 +130,8 @@ def CensorInput(comment):
     - censored_comment: Original comment with inappropriate words censored
     - found_words: List of inappropriate words found (empty if clean)
     """
-    curse_words = {
-        'fuck': ['fck', 'fuk', 'fvck', 'f*ck', 'f**k'],
-        'shit': ['sht', 'sh*t', 's**t', 'sh1t'],
-        'pussy': ['puss', 'p*ssy', 'p**sy'],
-        'sex': ['s3x', 's*x', 'seks'],
-        'ass': ['a$$', 'a**', 'as$'],
-        'bitch': ['b*tch', 'b**ch', 'bi*ch'],
-        'dick': ['d*ck', 'd**k', 'd1ck'],
-        'cunt': ['c*nt', 'c**t']
-    }
-
-    # Convert to lowercase for case-insensitive matching
-    comment_lower = comment.lower()
-    found_words = []
-    censored_comment = comment
-
-    # Build comprehensive pattern for all curse words and variations
-    all_patterns = []
-    for word, variations in curse_words.items():
-        all_variations = [word] + variations
-        # Match whole words with common variations
-        pattern = r'\b(' + '|'.join(re.escape(v) for v in all_variations) + r')\b'
-        all_patterns.append(pattern)
-
-    # Combine all patterns into one
-    master_pattern = '|'.join(all_patterns)
-
-    # Find all matches
-    matches = re.finditer(master_pattern, comment_lower)
-
-    for match in matches:
-        found_word = match.group()
-        found_words.append(found_word)
-        # Censor the word in original comment (preserving case)
-        start, end = match.span()
-        original_word = comment[start:end]
-        censored_word = original_word[0] + '*' * (len(original_word) - 1)
-        censored_comment = censored_comment.replace(original_word, censored_word)
-
-    is_appropriate = len(found_words) == 0
-
-    return is_appropriate, censored_comment, found_words
+    return get_matcher().censor(comment)
+
 
 # Example usage in CBV:
 """
@@ -65,7 +146,7 @@ class CommentCreateView(CreateView):
         comment_text = form.cleaned_data['content']
 
         # Use the censor function
-        is_appropriate, censored_content, found_words = censor_comment(comment_text)
+        is_appropriate, censored_content, found_words = CensorInput(comment_text)
 
         if not is_appropriate:
             # Add error message
@@ -77,20 +158,25 @@ class CommentCreateView(CreateView):
         return super().form_valid(form)
 """
 
-# Quick test
+# Microbenchmark
 if __name__ == '__main__':
-    test_comments = [
-        "This is a nice comment",
-        "What the fuck are you doing?",
-        "This is some bullshit",
-        "Have a nice day!",
-        "You're a b*tch for saying that"
-    ]
-
-    for comment in test_comments:
-        appropriate, censored, found = CensorInput(comment)
-        print(f"Original: {comment}")
-        print(f"Appropriate: {appropriate}")
-        print(f"Censored: {censored}")
-        print(f"Found: {found}")
-        print("-" * 50)
\ No newline at end of file
+    import random
+    import timeit
+
+    random.seed(0)
+    vocabulary = ('the', 'project', 'class', 'assessment', 'deadline', 'shipped', 'api', 'release',
+                  'great', 'sh1t', 'F*CK', 'b!tch', 'passes', 'dickens', 'Sussex', 'a55')
+    comments = []
+    for _ in range(200):
+        words = []
+        while sum(len(w) + 1 for w in words) < 2000:
+            words.append(random.choice(vocabulary))
+        comments.append(' '.join(words)[:2000])
+
+    matcher = _default_matcher
+    print(matcher.censor("You're a b*tch for saying that, but the class assessment passes"))
+    runs = 20
+    seconds = timeit.timeit(lambda: [matcher.censor(c) for c in comments], number=runs)
+    matches = sum(len(matcher.censor(c)[2]) for c in comments)
+    print(f"{len(comments)} comments x 2,000 chars, {matches // len(comments)} matches each: "
+          f"{seconds / (runs * len(comments)) * 1e6:.1f} us per comment")
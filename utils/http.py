@@ -0,0 +1,32 @@
+"""
+Content negotiation helpers shared by views that keep pre-compressed copies
+(Home.qr's gzipped SVG codes, utils.sitemaps).
+
+Django's own check, GZipMiddleware's \bgzip\b regex, treats any mention of
+gzip as acceptance, so "Accept-Encoding: gzip;q=0" - an explicit refusal -
+would still get a gzip body. accepts_gzip() reads the q-values instead.
+"""
+
+
+def accepts_gzip(request):
+    """Whether the request's Accept-Encoding allows gzip. "gzip;q=0" refuses
+    it, and "*" covers gzip unless gzip is listed itself."""
+    qvalues = {}
+    for entry in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qvalues:
+            return qvalues[coding] > 0
+    return False
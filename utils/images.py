@@ -0,0 +1,161 @@
+"""
+Responsive image derivatives for uploaded media.
+
+A model opts in by naming its upload field and adding a JSON field to hold
+the result:
+
+    responsive_image_field = "image"
+    responsive_image_widths = (480, 960, 1600)   # optional
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+After a save that changed the upload, Home.signals hands the row to a
+single background worker (after the transaction commits), which writes
+AVIF/WebP/JPEG copies at each width no wider than the original and records
+them on the row:
+
+    {"source": "posts/a.jpg", "width": 2400, "height": 1350,
+     "variants": {"avif": [[480, "derivatives/3f/3f2a...-480.avif"], ...],
+                  "webp": [...], "jpeg": [...]}}
+
+Derivative names are derived from a hash of the file's bytes, so the same
+picture uploaded twice (or re-saved) is encoded once. Templates render the
+recorded names with {% picture %} (Home/templatetags/responsive.py) and never
+open an image themselves; until the worker has run they get the original.
+
+`manage.py buildImageVariants` fills in rows the worker missed (existing
+uploads, a restarted process) and can prune orphaned derivative files.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = "derivatives"
+DEFAULT_WIDTHS = (480, 960, 1600)
+VARIANTS_FIELD = "image_variants"
+
+# format -> (file extension, MIME type, save() options); best first, which is
+# also the order of the <source> elements.
+FORMATS = {
+    "avif": ("avif", "image/avif", {"quality": 55}),
+    "webp": ("webp", "image/webp", {"quality": 78, "method": 6}),
+    "jpeg": ("jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_executor = None
+
+
+def available_formats():
+    """FORMATS this Pillow build can write; JPEG is always there."""
+    return [fmt for fmt in FORMATS if fmt == "jpeg" or features.check(fmt)]
+
+
+def responsive_models():
+    return [m for m in apps.get_models() if getattr(m, "responsive_image_field", None)]
+
+
+def needs_variants(instance):
+    """True if the row's current upload has no recorded derivatives."""
+    file = getattr(instance, instance.responsive_image_field)
+    recorded = getattr(instance, VARIANTS_FIELD) or {}
+    if not file:
+        return bool(recorded)
+    return recorded.get("source") != file.name
+
+
+def _flatten(img):
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    return img.convert("RGB")
+
+
+def build_variants(file, widths=DEFAULT_WIDTHS):
+    """Encode `file` (a FieldFile) at each width in every available format and
+    return the record to store in the variants field. Derivatives that already
+    exist in storage (same bytes seen before) are reused, not re-encoded."""
+    file.open("rb")
+    try:
+        data = file.read()
+    finally:
+        file.close()
+    digest = hashlib.sha256(data).hexdigest()[:20]
+
+    with Image.open(io.BytesIO(data)) as original:
+        img = _flatten(original)
+    width, height = img.size
+    targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+
+    variants = {fmt: [] for fmt in available_formats()}
+    for target in targets:
+        resized = None
+        for fmt, entries in variants.items():
+            ext, _, options = FORMATS[fmt]
+            name = f"{DERIVATIVES_DIR}/{digest[:2]}/{digest}-{target}.{ext}"
+            if not default_storage.exists(name):
+                if resized is None:
+                    resized = img if target == width else img.resize(
+                        (target, round(height * target / width)), Image.Resampling.LANCZOS
+                    )
+                buffer = io.BytesIO()
+                resized.save(buffer, fmt.upper(), **options)
+                saved = default_storage.save(name, ContentFile(buffer.getvalue()))
+                if saved != name:  # lost a race with another worker for the same bytes
+                    default_storage.delete(saved)
+            entries.append([target, name])
+    return {"source": file.name, "width": width, "height": height, "variants": variants}
+
+
+def process(model_label, pk, force=False):
+    """Build and record the derivatives for one row. Safe to call repeatedly;
+    a no-op if they are already recorded, unless `force`."""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not (force or needs_variants(instance)):
+        return False
+    field = model.responsive_image_field
+    file = getattr(instance, field)
+    record = {}
+    if file:
+        try:
+            record = build_variants(file, getattr(model, "responsive_image_widths", DEFAULT_WIDTHS))
+        except Exception as e:
+            logger.error(f"Building image variants for {model_label} #{pk} ({file.name}) failed: {e}")
+            return False
+    # Only record against the upload we encoded; if it changed meanwhile the
+    # next save schedules another run.
+    same_upload = Q(**{field: file.name}) if file else Q(**{field: ""}) | Q(**{f"{field}__isnull": True})
+    model.objects.filter(same_upload, pk=pk).update(**{VARIANTS_FIELD: record})
+    return True
+
+
+def _run(model_label, pk):
+    try:
+        process(model_label, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule(instance):
+    """Build `instance`'s derivatives on the background worker once the
+    current transaction commits (nothing happens if it rolls back)."""
+    global _executor
+    if not getattr(settings, "IMAGE_VARIANTS_IN_PROCESS", True):
+        return  # left to `manage.py buildImageVariants`
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-variants")
+    label, pk = instance._meta.label, instance.pk
+    transaction.on_commit(lambda: _executor.submit(_run, label, pk))
@@ -0,0 +1,167 @@
+"""
+Serving uploaded media (MEDIA_ROOT).
+
+serve_media() replaces django.conf.urls.static.static(), which only works
+with DEBUG on, sends every file whole, and ignores Range - so a browser
+cannot seek an AboutSection video without downloading all of it first.
+It does four things:
+
+    conditional GET   ETag (size + mtime) and Last-Modified; If-None-Match,
+                      If-Modified-Since, If-Match and If-Unmodified-Since are
+                      answered with 304/412 and no body
+    byte ranges       a single `Range: bytes=...` gets 206 with Content-Range
+                      (honouring If-Range); unsatisfiable ranges get 416;
+                      multi-range requests get the whole file (RFC 9110 allows it)
+    streaming         FileResponse over the open file. The file object keeps
+                      its fileno, so gunicorn's wsgi.file_wrapper sends it with
+                      sendfile(), a range included, without copying it through Python
+    offload           with MEDIA_ACCEL = "x-accel" (nginx) or "x-sendfile"
+                      (Apache/lighttpd) only the headers are produced and the
+                      proxy sends the file, ranges and all
+
+Hashed derivatives (utils.images) never change and are cached as immutable;
+everything else gets MEDIA_MAX_AGE.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from utils.images import DERIVATIVES_DIR
+
+# Not in every platform's mime.types.
+for _type, _ext in (
+    ("video/mp4", ".mp4"), ("video/webm", ".webm"), ("video/quicktime", ".mov"),
+    ("image/avif", ".avif"), ("image/webp", ".webp"),
+):
+    mimetypes.add_type(_type, _ext)
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class RangeFile:
+    """Read at most `length` bytes of `file` starting at `start`. Keeps
+    fileno() so a sendfile()-capable file_wrapper can still be used; it
+    starts at the current offset and stops at Content-Length."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+        self.name = file.name
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable byte range, None to
+    serve the whole file, or False if the range cannot be satisfied."""
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None  # malformed or a multi-range request: ignore the header
+    first, last = match.groups()
+    if not first:  # suffix: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag  # strong comparison; weak tags never match
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+@require_safe
+def serve_media(request, path):
+    path = posixpath.normpath(path).lstrip("/")
+    if any(part.startswith(".") for part in path.split("/")):
+        raise Http404
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    etag = quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": IMMUTABLE if path.startswith(f"{DERIVATIVES_DIR}/")
+        else f"public, max-age={getattr(settings, 'MEDIA_MAX_AGE', 60 * 60 * 24)}",
+    }
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    accel = getattr(settings, "MEDIA_ACCEL", "")
+    if accel:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if accel == "x-accel":
+            response["X-Accel-Redirect"] = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/") + quote(path)
+        else:
+            response["X-Sendfile"] = fullpath
+        return response
+
+    requested = None
+    if "HTTP_RANGE" in request.META and _if_range_matches(request, etag, stat.st_mtime):
+        requested = parse_range(request.META["HTTP_RANGE"], stat.st_size)
+    if requested is False:
+        return HttpResponse(status=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+    file = open(fullpath, "rb")
+    if requested is None:
+        response = FileResponse(file, content_type=content_type, headers=headers)
+    else:
+        start, end = requested
+        response = FileResponse(
+            RangeFile(file, start, end - start + 1), status=206, content_type=content_type, headers=headers
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,119 @@
+"""
+Bulk profanity screening of stored user text.
+
+A model opts in by listing the fields to screen and carrying the flag fields:
+
+    moderated_fields = ("subject", "message")
+    flagged = models.BooleanField(default=False)
+    flagged_words = models.CharField(max_length=255, blank=True, editable=False)
+    screened_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+moderate(queryset) walks the rows in primary-key order, one chunk at a time
+(WHERE pk > last ORDER BY pk LIMIT n, read with iterator() so no result
+cache builds up), hands each chunk's text to a pool of worker processes
+running utils.censorship, and writes the verdicts back: bulk_update() for
+the rows whose verdict changed, plus one UPDATE stamping screened_at. Only a
+few chunks are in flight at once, so memory stays flat however large the
+table is. Matching is pure-Python regex work that holds the GIL, hence
+processes rather than threads.
+
+Rows already screened are skipped unless `rescan` (e.g. after the word list
+changed). Used by `manage.py moderateContent` and the "Screen for
+profanity" admin action.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.contrib import admin
+from django.utils import timezone
+
+from utils import censorship
+
+_worker_matcher = None
+
+
+def moderated_models():
+    return [m for m in apps.get_models() if getattr(m, "moderated_fields", None)]
+
+
+def _init_worker(words):
+    global _worker_matcher
+    _worker_matcher = censorship.Matcher(words)
+
+
+def screen_rows(rows, matcher=None):
+    """[(pk, *texts)] -> [(pk, flagged, "word, word")]."""
+    matcher = matcher or _worker_matcher
+    results = []
+    for pk, *texts in rows:
+        _, _, found = matcher.censor("\n".join(t for t in texts if t))
+        results.append((pk, bool(found), ", ".join(dict.fromkeys(found))[:255]))
+    return results
+
+
+def _chunks(queryset, fields, chunk_size):
+    last = None
+    while True:
+        qs = queryset.order_by("pk")
+        if last is not None:
+            qs = qs.filter(pk__gt=last)
+        rows = list(qs.values_list("pk", *fields)[:chunk_size].iterator(chunk_size=chunk_size))
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def moderate(queryset, chunk_size=500, workers=None, rescan=False):
+    """Screen `queryset` (a moderated model) and record the verdicts.
+    `workers` = 0 screens in this process. Returns (screened, flagged)."""
+    model = queryset.model
+    if not rescan:
+        queryset = queryset.filter(screened_at__isnull=True)
+    matcher = censorship.get_matcher()
+    workers = os.cpu_count() if workers is None else workers
+    screened = flagged = 0
+
+    def write(results, current):
+        # bulk_update() only the rows whose verdict changed - on a mostly
+        # clean table that is almost none - and stamp the chunk in one UPDATE.
+        nonlocal screened, flagged
+        changed = [model(pk=pk, flagged=is_flagged, flagged_words=words)
+                   for pk, is_flagged, words in results if current[pk] != (is_flagged, words)]
+        if changed:
+            model.objects.bulk_update(changed, ("flagged", "flagged_words"), batch_size=chunk_size)
+        model.objects.filter(pk__in=list(current)).update(screened_at=timezone.now())
+        screened += len(results)
+        flagged += sum(1 for _, is_flagged, _ in results if is_flagged)
+
+    def split(rows):
+        current = {pk: (is_flagged, words) for pk, is_flagged, words, *_ in rows}
+        return [(pk, *texts) for pk, _, _, *texts in rows], current
+
+    chunks = _chunks(queryset, ("flagged", "flagged_words", *model.moderated_fields), chunk_size)
+    if not workers:
+        for rows in chunks:
+            payload, current = split(rows)
+            write(screen_rows(payload, matcher), current)
+        return screened, flagged
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(matcher.words,)) as pool:
+        pending = deque()
+        for rows in chunks:
+            payload, current = split(rows)
+            pending.append((pool.submit(screen_rows, payload), current))
+            if len(pending) >= workers * 2:
+                future, current = pending.popleft()
+                write(future.result(), current)
+        while pending:
+            future, current = pending.popleft()
+            write(future.result(), current)
+    return screened, flagged
+
+
+@admin.action(description="Screen selected for profanity")
+def screen_selected(modeladmin, request, queryset):
+    screened, flagged = moderate(queryset, workers=0, rescan=True)
+    modeladmin.message_user(request, f"Screened {screened}; {flagged} flagged.")
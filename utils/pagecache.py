@@ -0,0 +1,254 @@
+"""
+Full-page cache for anonymous visitors.
+
+PageCacheMiddleware stores the rendered response of the views named in
+settings.PAGE_CACHE_VIEWS and serves it again to later anonymous GETs.
+A request is only served from (or stored in) the cache when:
+
+    - it is a GET (or HEAD) with no query parameters other than
+      PAGE_CACHE_QUERY_PARAMS (page numbers, cursors and category filters;
+      searches are not cached)
+    - the user is anonymous and has no pending messages
+    - the response is a plain 200 that sets no cookies, did not ask for a
+      CSRF token and is not marked private/no-store
+
+Dependency tags
+    While a page renders, every SQL query is inspected and the models whose
+    tables it reads become the page's tags, e.g. {"Home.Solution",
+    "Home.PricingPlan"}. Fragment caches are covered too: utils.singleflight
+    and utils.singleton remember the tags their builders read and replay
+    them on a cache hit. Each tag has a version number in the cache; the
+    page stores the versions it was rendered with. Saving or deleting any
+    instance of a model (post_save, post_delete, m2m_changed, connected in
+    Home.signals) bumps its tag when the transaction commits, which makes
+    exactly the pages that read that model stale. Writes that bypass signals - QuerySet.update(), such
+    as the buffered view and like counters - show up after
+    PAGE_CACHE_TIMEOUT.
+
+Stale-while-revalidate
+    A stale page (purged, or older than PAGE_CACHE_TIMEOUT) is not dropped.
+    The first request to see it takes a short lock and renders a fresh copy;
+    every other request meanwhile gets the stale copy, so a purge costs one
+    render rather than a stampede. Pages are kept for PAGE_CACHE_STALE_TTL
+    beyond their fresh lifetime.
+
+A view class can define page_cache_hit(request, *args, **kwargs) for work
+that must happen even when the cached copy is served (e.g. counting a post
+view). Responses carry X-Page-Cache: hit, stale or miss.
+"""
+import contextvars
+import hashlib
+import re
+import time
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+TABLE_RE = re.compile(r'\b(?:FROM|JOIN)\s+["`\[]?(\w+)', re.IGNORECASE)
+
+Page = namedtuple("Page", "content status headers tags fresh_until")
+
+_tags = contextvars.ContextVar("pagecache_tags", default=None)
+_tables = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# Dependency tracking ----------------------------------------------------------
+
+def _table_labels():
+    global _tables
+    if _tables is None:
+        _tables = {m._meta.db_table.lower(): m._meta.label for m in apps.get_models(include_auto_created=True)}
+    return _tables
+
+
+class _TagRecorder:
+    """connection.execute_wrapper() hook adding the models a query reads to `tags`."""
+
+    def __init__(self, tags):
+        self.tags = tags
+
+    def __call__(self, execute, sql, params, many, context):
+        tables = _table_labels()
+        for table in TABLE_RE.findall(sql):
+            label = tables.get(table.lower())
+            if label:
+                self.tags.add(label)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def track():
+    """Collect the model labels read inside the block into the yielded set.
+    Nested blocks also report to the enclosing one."""
+    tags = set()
+    parent = _tags.get()
+    token = _tags.set(tags)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(_TagRecorder(tags)))
+            yield tags
+    finally:
+        _tags.reset(token)
+        if parent is not None:
+            parent.update(tags)
+
+
+def tracking():
+    return _tags.get() is not None
+
+
+def add_tags(tags):
+    """Report tags read from somewhere other than the database (a cached fragment)."""
+    current = _tags.get()
+    if current is not None:
+        current.update(tags)
+
+
+def _tag_key(tag):
+    return f"pagecache:tag:{tag}"
+
+
+def purge(*tags):
+    """Make every cached page tagged with any of `tags` stale."""
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            pass  # no page has read it since the cache was cleared
+
+
+def purge_model(sender, **kwargs):
+    """post_save/post_delete/m2m_changed receiver. Purges once the transaction
+    commits, like singleflight.invalidate(): purging earlier would let a
+    request in between store the old rows under the new tag versions."""
+    label = sender._meta.label
+    transaction.on_commit(lambda: purge(label))
+
+
+def _tag_versions(tags):
+    """{tag: version}, giving tags that have none yet a fresh one."""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        # Not 0/1: a version must not repeat after the key is evicted.
+        cache.add(key, time.time_ns())
+        found[key] = cache.get(key)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def _is_fresh(page):
+    if page.fresh_until < time.time():
+        return False
+    if not page.tags:
+        return True
+    current = cache.get_many([_tag_key(tag) for tag in page.tags])
+    return all(current.get(_tag_key(tag)) == version for tag, version in page.tags.items())
+
+
+# Middleware -------------------------------------------------------------------
+
+class PageCacheMiddleware:
+    """Must come after AuthenticationMiddleware and MessageMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        match = self._cacheable(request)
+        if match is None:
+            return self.get_response(request)
+
+        key = self._key(request)
+        page = cache.get(key)
+        revalidating = False
+        if page is not None:
+            fresh = _is_fresh(page)
+            revalidating = not fresh and cache.add(f"{key}:lock", 1, 30)
+            if not revalidating:
+                self._hit(request, match)
+                return self._response(page, "hit" if fresh else "stale")
+
+        # A re-render records the versions of the tags it expects to read
+        # before it starts, so a save that lands mid-render leaves it stale.
+        before = _tag_versions(page.tags) if page is not None else {}
+        try:
+            with track() as tags:
+                response = self.get_response(request)
+            if self._storable(request, response):
+                versions = _tag_versions(tags - before.keys())
+                versions.update((tag, before[tag]) for tag in tags & before.keys())
+                self._store(key, response, versions)
+        finally:
+            if revalidating:
+                cache.delete(f"{key}:lock")
+        response["X-Page-Cache"] = "miss"
+        return response
+
+    def _cacheable(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if set(request.GET) - set(_setting("PAGE_CACHE_QUERY_PARAMS", ())):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in _setting("PAGE_CACHE_VIEWS", ()):
+            return None
+        # A signed-in session, without loading the user (a query) to find out.
+        if SESSION_KEY in request.session or len(get_messages(request)):
+            return None
+        return match
+
+    def _key(self, request):
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.GET.items()))
+        url = f"{request.scheme}://{request.get_host()}{request.path}?{query}"
+        return f"pagecache:page:{hashlib.md5(url.encode()).hexdigest()}"
+
+    def _storable(self, request, response):
+        cache_control = response.get("Cache-Control", "")
+        return (
+            request.method == "GET"
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            and "private" not in cache_control
+            and "no-store" not in cache_control
+            and not len(get_messages(request))
+        )
+
+    def _store(self, key, response, versions):
+        timeout = _setting("PAGE_CACHE_TIMEOUT", 60 * 10)
+        page = Page(
+            content=response.content,
+            status=response.status_code,
+            headers=dict(response.items()),
+            tags=versions,
+            fresh_until=time.time() + timeout,
+        )
+        cache.set(key, page, timeout + _setting("PAGE_CACHE_STALE_TTL", 60 * 60 * 24))
+
+    def _response(self, page, state):
+        response = HttpResponse(page.content, status=page.status, headers=page.headers)
+        response["X-Page-Cache"] = state
+        return response
+
+    def _hit(self, request, match):
+        view = getattr(match.func, "view_class", match.func)
+        hook = getattr(view, "page_cache_hit", None)
+        if hook is not None:
+            hook(request, *match.args, **match.kwargs)
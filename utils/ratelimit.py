@@ -0,0 +1,206 @@
+"""
+Per-IP token-bucket rate limiting for anonymous endpoints.
+
+Each (scope, client IP) pair gets a bucket of `burst` tokens that refills at
+`rate`. A request spends one token; an empty bucket gets a 429 with a
+Retry-After header saying when the next token arrives.
+
+Buckets live in the Django cache named by settings.RATELIMIT_CACHE so every
+worker shares the same budget. If that cache is unavailable the limiter
+falls back to an in-process store, which still caps each worker on its own.
+
+Usage:
+    @ratelimit("contact", methods=["POST"])
+    def contact_view(request): ...
+
+    class ProjectListView(ListView):
+        @method_decorator(ratelimit("project_request"))
+        def post(self, request, *args, **kwargs): ...
+
+Clients are told apart by client_ip(): REMOTE_ADDR, or the address a
+trusted proxy (settings.TRUSTED_PROXIES) recorded in X-Forwarded-For. The
+header itself is written by the client, so it is never taken at face value.
+
+Budgets default to DEFAULT_RATES below and can be overridden per scope in
+settings.RATELIMITS, e.g. {"qr": "120/m", "contact": "10/h"}.
+"""
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+# "<tokens>/<period>", period is s, m, h or d
+DEFAULT_RATES = {
+    "qr": "120/m",
+    "qr_batch": "10/h",
+    "contact": "10/h",
+    "affiliate": "5/h",
+    "bcl_contact": "10/h",
+    "project_request": "10/h",
+}
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)"""
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period.strip().lower()[:1]]
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted(ip, networks):
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(request, default='unknown'):
+    """Get the client's IP address.
+
+    X-Forwarded-For is only read when the request comes from one of
+    settings.TRUSTED_PROXIES, and then the right-most hop that is not itself
+    a trusted proxy is the client: everything left of it was sent by the
+    client and can be anything."""
+    remote = request.META.get('REMOTE_ADDR') or ''
+    networks = _networks(tuple(getattr(settings, 'TRUSTED_PROXIES', ())))
+    if networks and _is_trusted(remote, networks):
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        for hop in reversed(hops):
+            if not _is_trusted(hop, networks):
+                try:
+                    return str(ipaddress.ip_address(hop))
+                except ValueError:
+                    break  # garbage where the proxy's entry should be
+    return remote or default
+
+
+class LocalBucketStore:
+    """In-process stand-in for the cache: a bounded dict of bucket states."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+
+    def get(self, key):
+        return self._buckets.get(key)
+
+    def set(self, key, value, timeout=None):
+        self._buckets[key] = value
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+_local_store = LocalBucketStore()
+# Serialise read-modify-write of a bucket within this process (striped so
+# unrelated clients don't queue behind each other). Across processes the
+# shared cache is last-writer-wins, which can let a burst through a request
+# or two early but never makes a request wait on another worker.
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _get_store():
+    alias = getattr(settings, "RATELIMIT_CACHE", "default")
+    if alias is None:
+        return _local_store
+    try:
+        return caches[alias]
+    except Exception as e:
+        logger.warning(f"Rate limit cache '{alias}' unavailable, using in-process store: {e}")
+        return _local_store
+
+
+def take_token(scope, ident, rate, burst=None, now=None):
+    """Spend one token from the (scope, ident) bucket.
+
+    Returns (allowed, retry_after_seconds)."""
+    count, period = parse_rate(rate)
+    capacity = burst or count
+    refill = count / period  # tokens per second
+    now = time.time() if now is None else now
+    key = f"rl:{scope}:{ident}"
+    timeout = math.ceil(capacity / refill) + 1  # a full bucket needn't be stored
+
+    with _locks[hash(key) % len(_locks)]:
+        store = _get_store()
+        try:
+            state = store.get(key)
+        except Exception as e:
+            logger.warning(f"Rate limit cache read failed, using in-process store: {e}")
+            store = _local_store
+            state = store.get(key)
+
+        tokens, updated = state if state else (capacity, now)
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        try:
+            store.set(key, (tokens, now), timeout)
+        except Exception as e:
+            logger.warning(f"Rate limit cache write failed, using in-process store: {e}")
+            _local_store.set(key, (tokens, now), timeout)
+
+    retry_after = 0 if allowed else math.ceil((1 - tokens) / refill)
+    return allowed, retry_after
+
+
+def rate_limited_response(request, retry_after):
+    """429 page (or JSON for fetch()/API callers) with a Retry-After header."""
+    wants_json = (
+        request.content_type == "application/json"
+        or "application/json" in request.META.get("HTTP_ACCEPT", "")
+    )
+    if wants_json:
+        response = JsonResponse(
+            {"success": False, "error": "Too many requests. Please try again later."},
+            status=429,
+        )
+    else:
+        response = render(request, "errors/429.html", {"retry_after": retry_after}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def ratelimit(scope, rate=None, burst=None, methods=None):
+    """View decorator applying the `scope` budget per client IP.
+
+    `methods` limits which HTTP methods spend tokens (default: all)."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if getattr(settings, "RATELIMIT_ENABLED", True) and (
+                methods is None or request.method in methods
+            ):
+                budget = rate or getattr(settings, "RATELIMITS", {}).get(scope) or DEFAULT_RATES[scope]
+                allowed, retry_after = take_token(scope, client_ip(request), budget, burst)
+                if not allowed:
+                    logger.warning(f"Rate limit '{scope}' hit by {client_ip(request)} on {request.path}")
+                    return rate_limited_response(request, retry_after)
+            return view_func(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
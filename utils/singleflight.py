@@ -0,0 +1,107 @@
+"""
+Single-flight cache helper.
+
+get_or_build(key, builder) returns the cached value for `key`. On a miss
+exactly one caller (per cache backend) runs `builder()`; the rest are served
+the previous value while it rebuilds, or wait briefly for the winner. A
+cache miss under load therefore costs one rebuild, not one per request.
+
+invalidate(key) drops the fresh value but keeps the last one around as a
+stale copy for those waiting callers, so invalidating from a post_save
+signal never causes a stampede. It acts when the current transaction
+commits - before that, a rebuild would only read the old rows again - and
+bumps the key's generation, so a build that was already running when the
+data changed does not write its outdated result back.
+
+The models a builder reads are remembered next to the value (utils.pagecache
+tags), so a page served from the full-page cache is still purged when the
+data behind one of its cached fragments changes.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from utils import pagecache
+
+_MISSING = object()
+
+
+def _stale_key(key):
+    return f"{key}:stale"
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _tags_key(key):
+    return f"{key}:tags"
+
+
+def _generation_key(key):
+    return f"{key}:gen"
+
+
+def _build(key, builder, timeout=None, store=False):
+    generation = cache.get(_generation_key(key))
+    with pagecache.track() as tags:
+        value = builder()
+    # Invalidated while building: the value may predate the change.
+    if store and cache.get(_generation_key(key)) == generation:
+        cache.set(key, value, timeout)
+        cache.set(_stale_key(key), value, None)
+        cache.set(_tags_key(key), frozenset(tags), None)
+    return value
+
+
+def _hit(key, value):
+    if pagecache.tracking():
+        pagecache.add_tags(cache.get(_tags_key(key), ()))
+    return value
+
+
+def get_or_build(key, builder, timeout=None, lock_timeout=30, wait_timeout=5):
+    """Return the cached value for `key`, building it with `builder()` on a miss.
+
+    `timeout` is the fresh lifetime in seconds (None = until invalidated).
+    `lock_timeout` bounds how long a crashed builder can hold the rebuild lock.
+    A caller that loses the race and finds no stale copy polls for up to
+    `wait_timeout` seconds before building the value itself."""
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return _hit(key, value)
+
+    if cache.add(_lock_key(key), 1, lock_timeout):
+        try:
+            value = _build(key, builder, timeout, store=True)
+        finally:
+            cache.delete(_lock_key(key))
+        return value
+
+    value = cache.get(_stale_key(key), _MISSING)
+    if value is not _MISSING:
+        return _hit(key, value)
+
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return _hit(key, value)
+    return _build(key, builder)
+
+
+def invalidate(*keys):
+    """Expire the fresh value for each key (stale copies are kept) once the
+    current transaction, if any, commits."""
+    transaction.on_commit(lambda: _invalidate(keys))
+
+
+def _invalidate(keys):
+    for key in keys:
+        try:
+            cache.incr(_generation_key(key))
+        except ValueError:
+            cache.set(_generation_key(key), 1, None)
+    cache.delete_many(keys)
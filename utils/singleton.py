@@ -0,0 +1,66 @@
+"""
+Cached singleton rows (site settings and the like).
+
+CachedSingleton(key, loader) keeps the loaded row in two tiers:
+
+    process-local   a plain attribute, trusted for SINGLETON_LOCAL_TTL
+                    seconds - no cache round trip, no unpickling
+    shared cache    utils.singleflight.get_or_build(key, loader), so after an
+                    edit one worker reloads from the database, not all of them;
+                    kept for SINGLETON_CACHE_TIMEOUT at most
+
+In the steady state a read costs no queries at all. Save/delete signals call
+invalidate(), which drops the shared copy and this process's copy once the
+transaction commits; other processes pick the change up when their local
+TTL runs out.
+
+The models the loader read (utils.pagecache tags) are kept with the local
+copy, so a page that used it can still be purged when the row changes.
+
+The loader must not write: return an unsaved default instance (or None)
+when the row does not exist yet.
+"""
+import time
+import weakref
+
+from django.conf import settings
+from django.db import transaction
+
+from utils import pagecache
+from utils.singleflight import get_or_build, invalidate
+
+_instances = weakref.WeakSet()
+
+
+class CachedSingleton:
+
+    def __init__(self, key, loader):
+        self.key = key
+        self.loader = loader
+        self._entry = None  # (value, expires at, tags)
+        _instances.add(self)
+
+    def get(self):
+        entry = self._entry
+        if entry is not None and entry[1] > time.monotonic():
+            pagecache.add_tags(entry[2])
+            return entry[0]
+        timeout = getattr(settings, "SINGLETON_CACHE_TIMEOUT", 60 * 60)
+        with pagecache.track() as tags:
+            value = get_or_build(self.key, self.loader, timeout=timeout)
+        self._entry = (value, time.monotonic() + getattr(settings, "SINGLETON_LOCAL_TTL", 5), frozenset(tags))
+        return value
+
+    def invalidate(self):
+        """Drop both copies when the current transaction commits."""
+        transaction.on_commit(self.clear_local)
+        invalidate(self.key)
+
+    def clear_local(self):
+        self._entry = None
+
+
+def clear_local():
+    """Forget every process-local copy (e.g. between tests that clear the cache)."""
+    for singleton in list(_instances):
+        singleton.clear_local()
@@ -0,0 +1,128 @@
+"""
+Cached sitemap index and per-section sitemaps.
+
+Replaces django.contrib.sitemaps.views.sitemap, which re-queried and
+re-rendered every Solution, PortfolioProject and Post on each crawler hit.
+/sitemap.xml is now an index pointing at /sitemap-<section>.xml, and each
+section is rendered once and kept in the cache together with a gzipped copy
+and its ETag.
+
+A request costs one aggregate query per section: the newest lastmod and the
+row count of the section's items (Sitemap.lastmod_field names the column).
+Only when that changes - an edit, a new or unpublished row - is the section
+rendered again. Sections without a lastmod_field (the static pages) are
+versioned by their URLs. SITEMAP_CACHE_TIMEOUT is a safety-net expiry for
+changes neither catches, such as a renamed slug.
+
+Responses carry ETag and Last-Modified, so a crawler's conditional GET for
+an unchanged section gets a 304, and the gzip copy is sent to clients that
+accept it (utils.http.accepts_gzip).
+"""
+import gzip
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.sitemaps.views import SitemapIndexItem, x_robots_tag
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+from django.db.models import Count, Max, QuerySet
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from utils.http import accepts_gzip
+
+Rendered = namedtuple("Rendered", "version xml gzipped etag last_modified")
+
+
+def section_version(sitemap):
+    """(version, newest lastmod or None) for the items of `sitemap`."""
+    items = sitemap.items()
+    field = getattr(sitemap, "lastmod_field", None)
+    if field and isinstance(items, QuerySet):
+        summary = items.order_by().aggregate(latest=Max(field), count=Count("pk"))
+        latest = summary["latest"]
+        return f"{summary['count']}:{latest.isoformat() if latest else ''}", latest
+    locations = "\n".join(str(sitemap.location(item)) for item in items)
+    return hashlib.md5(locations.encode()).hexdigest(), None
+
+
+def _render(version, xml, last_modified):
+    xml = xml.encode()
+    return Rendered(
+        version=version,
+        xml=xml,
+        gzipped=gzip.compress(xml, compresslevel=9, mtime=0),
+        etag=f'W/"{hashlib.md5(xml).hexdigest()[:20]}"',  # weak: same for both encodings
+        last_modified=last_modified,
+    )
+
+
+def _cached(request, name, version, build):
+    key = f"sitemap:{request.scheme}://{request.get_host()}:{name}"
+    entry = cache.get(key)
+    if entry is None or entry.version != version:
+        entry = build()
+        cache.set(key, entry, getattr(settings, "SITEMAP_CACHE_TIMEOUT", 60 * 60 * 24))
+    return entry
+
+
+def _section(request, name, sitemap):
+    if isinstance(sitemap, type):
+        sitemap = sitemap()
+    version, latest = section_version(sitemap)
+
+    def build():
+        urls = sitemap.get_urls(page=1, site=get_current_site(request), protocol=request.scheme)
+        return _render(version, render_to_string("sitemap.xml", {"urlset": urls}), latest)
+
+    return _cached(request, name, version, build)
+
+
+def _respond(request, entry):
+    last_modified = int(entry.last_modified.timestamp()) if entry.last_modified else None
+    response = get_conditional_response(request, etag=entry.etag, last_modified=last_modified)
+    if response is None:
+        if accepts_gzip(request):
+            response = HttpResponse(entry.gzipped, content_type="application/xml")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(entry.xml, content_type="application/xml")
+    response["ETag"] = entry.etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = f"public, max-age={getattr(settings, 'SITEMAP_MAX_AGE', 60 * 60)}"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+@require_safe
+@x_robots_tag
+def index(request, sitemaps, sitemap_url_name="django.contrib.sitemaps.views.sitemap"):
+    sections = {name: _section(request, name, sitemap) for name, sitemap in sitemaps.items()}
+    version = ",".join(entry.etag for entry in sections.values())
+
+    def build():
+        items = [
+            SitemapIndexItem(
+                request.build_absolute_uri(reverse(sitemap_url_name, kwargs={"section": name})),
+                entry.last_modified,
+            )
+            for name, entry in sections.items()
+        ]
+        latest = max((entry.last_modified for entry in sections.values() if entry.last_modified), default=None)
+        return _render(version, render_to_string("sitemap_index.xml", {"sitemaps": items}), latest)
+
+    return _respond(request, _cached(request, "index", version, build))
+
+
+@require_safe
+@x_robots_tag
+def section(request, sitemaps, section):
+    if section not in sitemaps:
+        raise Http404(f"No sitemap available for section: {section!r}")
+    return _respond(request, _section(request, section, sitemaps[section]))
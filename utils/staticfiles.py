@@ -0,0 +1,31 @@
+"""
+Static files storage.
+
+WhiteNoise's CompressedManifestStaticFilesStorage, which at collectstatic
+time writes a content-hashed copy of every asset (css/style.3f2a9c1b.css)
+with .gz and .br siblings, and records the mapping in staticfiles.json.
+{% static %} then emits the hashed name, so WhiteNoise can serve it with
+`Cache-Control: max-age=315360000, public, immutable`: a changed file gets
+a new URL instead of waiting out a cache.
+
+The stock storage raises (and the page 500s) when a template names a file
+that isn't in the manifest. Here the plain, unhashed URL is returned
+instead, so a typo or a file that was never committed costs one 404 for
+that asset, not the whole page. The miss is only logged at DEBUG: WhiteNoise
+itself probes url() with unhashed names when it starts, and expects misses.
+"""
+import logging
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.debug(f"Static file {name!r} is not in the manifest; serving it unhashed")
+            return name
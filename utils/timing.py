@@ -0,0 +1,154 @@
+"""
+Request timing and SQL instrumentation.
+
+RequestTimingMiddleware measures, for every request:
+
+    db     - number of SQL queries and the time spent in them (all databases)
+    tpl    - time spent rendering a TemplateResponse (function views that call
+             render() themselves count it as view time)
+    total  - wall time through the rest of the middleware stack and the view
+
+and reports them in a Server-Timing header (shown in the browser dev-tools
+network panel) when DEBUG is on or the user is staff.
+
+Requests slower than settings.SLOW_REQUEST_MS are written as one JSON object
+per line to the "timing.slow" logger (a rotating file, see LOGGING), and
+every request feeds a per-view rolling window from which p50/p95/p99 are
+computed for the staff-only /staff/timing/ endpoint. The windows are per
+process: each worker reports what it has served itself.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import empty
+
+slow_logger = logging.getLogger("timing.slow")
+
+
+class ViewTimings:
+    """Rolling window of the last `size` total times (ms) per view."""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self._samples = defaultdict(lambda: deque(maxlen=self.size))
+        self._lock = threading.Lock()
+
+    def add(self, view, total_ms, queries):
+        with self._lock:
+            self._samples[view].append((total_ms, queries))
+
+    @staticmethod
+    def percentile(ordered, pct):
+        """Nearest-rank percentile of an ascending list."""
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+    def summary(self):
+        """{view: {count, p50, p95, p99, max, avg_queries}} slowest p95 first."""
+        with self._lock:
+            snapshot = {view: list(samples) for view, samples in self._samples.items()}
+        result = {}
+        for view, samples in snapshot.items():
+            times = sorted(t for t, _ in samples)
+            result[view] = {
+                "count": len(times),
+                "p50": round(self.percentile(times, 50), 1),
+                "p95": round(self.percentile(times, 95), 1),
+                "p99": round(self.percentile(times, 99), 1),
+                "max": round(times[-1], 1),
+                "avg_queries": round(sum(q for _, q in samples) / len(samples), 1),
+            }
+        return dict(sorted(result.items(), key=lambda item: item[1]["p95"], reverse=True))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+view_timings = ViewTimings(getattr(settings, "TIMING_WINDOW", 1000))
+
+
+class QueryTimer:
+    """connection.execute_wrapper() hook counting queries and their duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestTimingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._template_time = 0.0
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(timer))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        self.record(request, response, timer, total)
+        if settings.DEBUG or self.is_loaded_staff_user(request):
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"',
+                f"tpl;dur={request._template_time * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ])
+        return response
+
+    @staticmethod
+    def is_loaded_staff_user(request):
+        """Staff check that never costs a query: if the view didn't need the
+        user, the lazy request.user is left unevaluated and we skip the header."""
+        user = getattr(request, "user", None)
+        if user is None or getattr(user, "_wrapped", None) is empty:
+            return False
+        return user.is_staff
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def _rendered(response):
+            request._template_time += time.perf_counter() - start
+
+        response.add_post_render_callback(_rendered)
+        return response
+
+    def record(self, request, response, timer, total):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return  # 404s and static files don't belong to a view
+        view = match.view_name or match._func_path
+        total_ms = total * 1000
+        view_timings.add(view, total_ms, timer.count)
+
+        if total_ms >= getattr(settings, "SLOW_REQUEST_MS", 500):
+            slow_logger.warning(json.dumps({
+                "ts": round(time.time(), 3),
+                "view": view,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 1),
+                "db_ms": round(timer.duration * 1000, 1),
+                "queries": timer.count,
+                "template_ms": round(request._template_time * 1000, 1),
+            }))